@@ -3,27 +3,196 @@ PDF Analysis Script
 Extracts metadata and sample content from the geological PDFs
 """
 import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pypdf import PdfReader
 import json
 
-def analyze_pdf(pdf_path):
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bytes read from the end of the file to locate startxref/trailer
+TAIL_SIZE = 2048
+
+# Bytes read at an object offset - enough for Info/Catalog/Pages dicts
+OBJECT_READ_SIZE = 4096
+
+_INFO_KEYS = {'/Title': 'title', '/Author': 'author', '/Subject': 'subject', '/Creator': 'creator'}
+
+
+def _json_bytes(obj):
+    """Serialize to indented UTF-8 JSON (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _decode_pdf_string(raw):
+    """Decode a PDF literal (...) or hex <...> string"""
+    if raw.startswith(b'<'):
+        data = bytes.fromhex(re.sub(rb'\s', b'', raw[1:-1]).decode('ascii'))
+    else:
+        data = bytearray()
+        body = raw[1:-1]
+        i = 0
+        while i < len(body):
+            c = body[i]
+            if c == 0x5C and i + 1 < len(body):  # backslash escape
+                i += 1
+                esc = body[i:i + 1]
+                if esc in b'01234567':
+                    octal = re.match(rb'[0-7]{1,3}', body[i:i + 3]).group(0)
+                    data.append(int(octal, 8) & 0xFF)
+                    i += len(octal)
+                    continue
+                data += {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}.get(esc, esc)
+            else:
+                data.append(c)
+            i += 1
+        data = bytes(data)
+    
+    if data.startswith(b'\xfe\xff'):
+        return data[2:].decode('utf-16-be', errors='replace')
+    return data.decode('latin-1')
+
+
+def _dict_value(dict_bytes, key):
+    """Get the raw value of a key from a PDF dictionary (string, ref or number)"""
+    match = re.search(
+        re.escape(key.encode()) + rb'\s*(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|\d+\s+\d+\s+R|\d+)',
+        dict_bytes,
+        re.DOTALL
+    )
+    return match.group(1) if match else None
+
+
+def _find_xref_offset(f, xref_pos, obj_num):
+    """Look up an object's byte offset in a classic xref table (follows /Prev)"""
+    seen = set()  # xref offsets already searched - a /Prev loop ends the search
+    while xref_pos is not None and xref_pos not in seen:
+        seen.add(xref_pos)
+        f.seek(xref_pos)
+        if f.readline().strip() != b'xref':
+            return None  # xref stream (PDF 1.5+) - not handled on the fast path
+        
+        while True:
+            line_pos = f.tell()
+            header = f.readline().split()
+            if len(header) != 2 or not header[0].isdigit():
+                break  # reached 'trailer'
+            first, count = int(header[0]), int(header[1])
+            entries_pos = f.tell()
+            if first <= obj_num < first + count:
+                # Each xref entry is exactly 20 bytes: "oooooooooo ggggg n\r\n"
+                f.seek(entries_pos + (obj_num - first) * 20)
+                entry = f.read(20).split()
+                if len(entry) == 3 and entry[2] == b'n':
+                    return int(entry[0])
+            f.seek(entries_pos + count * 20)
+        
+        # Only this section's trailer dictionary - it may start on the
+        # 'trailer' line itself, and ends before its startxref
+        f.seek(line_pos)
+        trailer = f.read(TAIL_SIZE)
+        if not trailer.lstrip().startswith(b'trailer'):
+            return None
+        trailer = trailer.split(b'startxref', 1)[0]
+        prev = _dict_value(trailer, '/Prev')
+        xref_pos = int(prev) if prev else None
+    
+    return None
+
+
+def _read_object(f, xref_pos, ref):
+    """Read the dictionary of an indirect object given 'N G R' bytes"""
+    offset = _find_xref_offset(f, xref_pos, int(ref.split()[0]))
+    if offset is None:
+        return None
+    f.seek(offset)
+    return f.read(OBJECT_READ_SIZE).split(b'endobj', 1)[0]
+
+
+def get_metadata_fast(pdf_path, file_size=None):
+    """
+    Read title/author/page count from the trailer without a full PdfReader
+    Only seeks to the handful of objects needed (Info, Catalog, Pages)
+    Returns None when the file needs the full parser (xref streams, encryption)
+    """
+    if file_size is None:
+        file_size = os.path.getsize(pdf_path)
+    
+    try:
+        with open(pdf_path, 'rb') as f:
+            f.seek(max(0, file_size - TAIL_SIZE))
+            tail = f.read()
+            
+            startxref = tail.rfind(b'startxref')
+            trailer_start = tail.rfind(b'trailer', 0, startxref)
+            if startxref == -1 or trailer_start == -1:
+                return None
+            
+            xref_pos = int(tail[startxref + len(b'startxref'):].split()[0])
+            trailer = tail[trailer_start:startxref]
+            if _dict_value(trailer, '/Encrypt'):
+                return None
+            
+            metadata = {
+                'filename': os.path.basename(pdf_path),
+                'file_size_mb': round(file_size / (1024 * 1024), 2)
+            }
+            
+            # Page count lives in the page tree root: Catalog -> /Pages -> /Count
+            root_ref = _dict_value(trailer, '/Root')
+            catalog = _read_object(f, xref_pos, root_ref) if root_ref else None
+            pages_ref = _dict_value(catalog, '/Pages') if catalog else None
+            pages = _read_object(f, xref_pos, pages_ref) if pages_ref else None
+            count = _dict_value(pages, '/Count') if pages else None
+            if count is None:
+                return None
+            metadata['num_pages'] = int(count)
+            
+            info_ref = _dict_value(trailer, '/Info')
+            info = _read_object(f, xref_pos, info_ref) if info_ref else None
+            if info:
+                for pdf_key, field in _INFO_KEYS.items():
+                    value = _dict_value(info, pdf_key)
+                    metadata[field] = _decode_pdf_string(value) if value and value[:1] in b'(<' else 'N/A'
+            
+            return metadata
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def analyze_pdf(pdf_path, metadata_only=False):
     """Extract metadata and content summary from a PDF"""
     try:
+        file_size = os.path.getsize(pdf_path)
+        
+        if metadata_only:
+            metadata = get_metadata_fast(pdf_path, file_size)
+            if metadata is not None:
+                return metadata
+        
         reader = PdfReader(pdf_path)
         
         # Get metadata
         metadata = {
             'filename': os.path.basename(pdf_path),
             'num_pages': len(reader.pages),
-            'file_size_mb': round(os.path.getsize(pdf_path) / (1024 * 1024), 2)
+            'file_size_mb': round(file_size / (1024 * 1024), 2)
         }
         
         # Try to extract title and author from metadata
         if reader.metadata:
-            metadata['title'] = reader.metadata.get('/Title', 'N/A')
-            metadata['author'] = reader.metadata.get('/Author', 'N/A')
-            metadata['subject'] = reader.metadata.get('/Subject', 'N/A')
-            metadata['creator'] = reader.metadata.get('/Creator', 'N/A')
+            for pdf_key, field in _INFO_KEYS.items():
+                metadata[field] = reader.metadata.get(pdf_key, 'N/A')
+        
+        if metadata_only:
+            return metadata
         
         # Extract first few pages content for analysis
         sample_text = ""
@@ -58,39 +227,48 @@ def analyze_pdf(pdf_path):
 def main():
     pdf_dir = r'c:\cod\licenta'
     
+    # --metadata-only skips sample text and reads only the PDF trailer
+    metadata_only = '--metadata-only' in sys.argv
+    
     # Find all PDFs
     pdf_files = [f for f in os.listdir(pdf_dir) if f.endswith('.pdf')]
     
     print(f"Found {len(pdf_files)} PDF files\n")
     print("=" * 80)
     
-    all_analyses = []
+    pdf_paths = [os.path.join(pdf_dir, f) for f in pdf_files]
+    output_file = os.path.join(pdf_dir, 'pdf_analysis.json')
     
-    for pdf_file in pdf_files:
-        pdf_path = os.path.join(pdf_dir, pdf_file)
-        print(f"\nAnalyzing: {pdf_file}")
-        print("-" * 80)
+    # Analyze PDFs in parallel - results come back in input order and are
+    # written to the JSON array as they arrive instead of being held in RAM
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor, \
+            open(output_file, 'wb') as out:
+        analyses = executor.map(partial(analyze_pdf, metadata_only=metadata_only), pdf_paths)
+        out.write(b'[\n')
         
-        analysis = analyze_pdf(pdf_path)
-        all_analyses.append(analysis)
+        for idx, (pdf_file, analysis) in enumerate(zip(pdf_files, analyses)):
+            print(f"\nAnalyzing: {pdf_file}")
+            print("-" * 80)
+            
+            # Print summary
+            print(f"Pages: {analysis.get('num_pages', 'N/A')}")
+            print(f"Size: {analysis.get('file_size_mb', 'N/A')} MB")
+            print(f"Title: {analysis.get('title', 'N/A')}")
+            print(f"Author: {analysis.get('author', 'N/A')}")
+            
+            if 'sample_content' in analysis:
+                print(f"\nFirst few pages preview:")
+                print(analysis['sample_content'][:2000])
+            
+            if 'error' in analysis:
+                print(f"ERROR: {analysis['error']}")
+            
+            # Save analysis to JSON
+            if idx:
+                out.write(b',\n')
+            out.write(_json_bytes(analysis))
         
-        # Print summary
-        print(f"Pages: {analysis.get('num_pages', 'N/A')}")
-        print(f"Size: {analysis.get('file_size_mb', 'N/A')} MB")
-        print(f"Title: {analysis.get('title', 'N/A')}")
-        print(f"Author: {analysis.get('author', 'N/A')}")
-        
-        if 'sample_content' in analysis:
-            print(f"\nFirst few pages preview:")
-            print(analysis['sample_content'][:2000])
-        
-        if 'error' in analysis:
-            print(f"ERROR: {analysis['error']}")
-    
-    # Save full analysis to JSON
-    output_file = os.path.join(pdf_dir, 'pdf_analysis.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_analyses, f, indent=2, ensure_ascii=False)
+        out.write(b'\n]\n')
     
     print("\n" + "=" * 80)
     print(f"\nFull analysis saved to: pdf_analysis.json")
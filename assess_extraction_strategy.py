@@ -5,24 +5,97 @@ Focus on building GraphRAG with available data (559 pages already extracted)
 
 from pypdf import PdfReader
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
 
-def deep_text_extraction(pdf_path):
+try:
+    import pypdfium2 as pdfium  # PDFium engine - much faster text extraction
+except ImportError:
+    pdfium = None
+
+# Pages handed to a worker per task - each task extracts a contiguous slice
+PAGES_PER_TASK = 8
+
+# Document opened once per worker process (see _init_worker)
+_worker_doc = None
+_worker_pages = None
+_worker_backend = None
+
+def _open_document(pdf_path, backend):
+    """Open a PDF with the requested backend ('pdfium' or 'pypdf')"""
+    if backend == 'pdfium':
+        return pdfium.PdfDocument(pdf_path)
+    return PdfReader(pdf_path, strict=False)
+
+def _init_worker(pdf_path, backend):
+    """Open the PDF once in each worker so pages don't re-parse the file"""
+    global _worker_doc, _worker_pages, _worker_backend
+    _worker_doc = _open_document(pdf_path, backend)
+    _worker_backend = backend
+    # pypdf resolves page references lazily on every reader.pages[i];
+    # resolve them all once and index the list instead
+    _worker_pages = list(_worker_doc.pages) if backend == 'pypdf' else None
+
+def _extract_page_text(page_index):
+    """Extract text from a single page (runs inside a worker process)"""
+    try:
+        if _worker_backend == 'pdfium':
+            page = _worker_doc[page_index]
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+        return _worker_pages[page_index].extract_text()
+    except Exception:
+        return None
+
+def _extract_page_range(page_range):
+    """Extract text from pages [start, end) with the worker's open document"""
+    start, end = page_range
+    return [_extract_page_text(page_index) for page_index in range(start, end)]
+
+def deep_text_extraction(pdf_path, backend='pdfium', early_exit_empty=300):
     """
     More aggressive text extraction attempt
+    Pages are extracted in parallel - extraction is CPU-bound per page
+    
+    backend: 'pdfium' (default, needs pypdfium2) or 'pypdf' for PDFs
+             where PDFium returns garbage
+    early_exit_empty: stop once more than this many pages are empty and
+                      almost nothing was extracted (None = read every page)
+    
+    Returns (extracted_pages, empty_pages, truncated)
     """
-    reader = PdfReader(pdf_path)
+    if backend == 'pdfium' and pdfium is None:
+        print("pypdfium2 not installed - falling back to pypdf")
+        backend = 'pypdf'
+    
+    doc = _open_document(pdf_path, backend)
+    num_pages = len(doc) if backend == 'pdfium' else len(doc.pages)
+    if backend == 'pdfium':
+        doc.close()
     
     print(f"\nAnalyzing: {Path(pdf_path).name}")
-    print(f"Pages: {len(reader.pages)}")
+    print(f"Pages: {num_pages} (backend: {backend})")
     
     extracted_pages = []
     empty_pages = 0
+    truncated = False
     
-    for page_num, page in enumerate(reader.pages, 1):
-        try:
-            text = page.extract_text()
-            
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             initializer=_init_worker,
+                             initargs=(pdf_path, backend)) as executor:
+        # Each task is a contiguous slice of pages; map() preserves page order
+        page_ranges = [(start, min(start + PAGES_PER_TASK, num_pages))
+                       for start in range(0, num_pages, PAGES_PER_TASK)]
+        page_texts = chain.from_iterable(executor.map(_extract_page_range, page_ranges))
+        
+        for page_num, text in enumerate(page_texts, 1):
             if text and len(text.strip()) > 30:
                 extracted_pages.append({
                     'page': page_num,
@@ -31,17 +104,22 @@ def deep_text_extraction(pdf_path):
                 })
             else:
                 empty_pages += 1
-                
-        except Exception as e:
-            empty_pages += 1
-            continue
+            
+            # Clearly a scanned PDF - further pages only confirm it
+            if (early_exit_empty is not None and page_num < num_pages
+                    and empty_pages > early_exit_empty and len(extracted_pages) < 10):
+                truncated = True
+                executor.shutdown(wait=False, cancel_futures=True)
+                break
     
     print(f"✓ Extracted text from {len(extracted_pages)} pages")
     print(f"✗ {empty_pages} pages had no extractable text (likely scanned images)")
+    if truncated:
+        print(f"  (stopped early after page {page_num} of {num_pages})")
     
-    return extracted_pages, empty_pages
+    return extracted_pages, empty_pages, truncated
 
-def analyze_field_catalog():
+def analyze_field_catalog(backend='pdfium'):
     """
     Analyze the problematic 1979 PDF
     Since it's image-based, we'll note which pages and proceed with other documents
@@ -49,7 +127,7 @@ def analyze_field_catalog():
     
     pdf_path = r'c:\cod\licenta\Paraschiv 1979 - Ro oil _ gas fields STE_Seria_A_vol_13.pdf'
     
-    extracted, empty = deep_text_extraction(pdf_path)
+    extracted, empty, truncated = deep_text_extraction(pdf_path, backend)
     
     if empty > 300:  # Most pages are images
         print(f"\n⚠️  This PDF is primarily scanned images.")
@@ -62,12 +140,22 @@ def analyze_field_catalog():
 def main():
     """Quick assessment"""
     
+    # --backend pypdf switches text extraction away from PDFium
+    backend = 'pdfium'
+    if '--backend' in sys.argv:
+        value_idx = sys.argv.index('--backend') + 1
+        backend = sys.argv[value_idx] if value_idx < len(sys.argv) else None
+        if backend not in ('pdfium', 'pypdf'):
+            print("\nUsage:")
+            print("  python assess_extraction_strategy.py [--backend pdfium|pypdf]")
+            return
+    
     print("="*80)
     print("PDF EXTRACTION ASSESSMENT")
     print("="*80)
     
     # Check the problematic PDF
-    catalog_pages = analyze_field_catalog()
+    catalog_pages = analyze_field_catalog(backend)
     
     print(f"\n{'='*80}")
     print("DECISION: Proceed with GraphRAG Implementation")
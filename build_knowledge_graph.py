@@ -4,13 +4,109 @@ Builds knowledge graph from extracted PDF text
 Uses lightweight approach without heavy dependencies
 """
 
+import heapq
 import json
+import os
+import pickle
 import re
+import sys
 from collections import defaultdict
+from operator import itemgetter
 from pathlib import Path
 import networkx as nx
+import numpy as np
 from typing import List, Dict, Set, Tuple
 
+try:
+    import ahocorasick  # pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # incremental JSON parsing
+except ImportError:
+    ijson = None
+
+# Sentence boundary used for co-mention grouping
+SENTENCE_END = re.compile(r'\.')
+
+# Terminology entity type -> entity catalog category
+ENTITY_CATEGORIES = {
+    'platform': 'platforms',
+    'basin': 'platforms',
+    'zone': 'zones',
+    'rock': 'rocks',
+}
+
+
+def accumulate_pairs(entity_ids, sentence_ids, counts, max_len):
+    """
+    Add every ordered within-sentence pair (earlier id -> later id) to counts
+    
+    entity_ids holds each sentence's term ids as one contiguous, sorted run,
+    so positions i and i+d form a pair exactly when their sentence ids match.
+    One vectorized pass per offset d replaces the per-sentence double loop.
+    """
+    for d in range(1, max_len):
+        same = sentence_ids[:-d] == sentence_ids[d:]
+        np.add.at(counts, (entity_ids[:-d][same], entity_ids[d:][same]), 1)
+
+
+def bucket_sentence_hits(hits, sentence_bounds, num_terms):
+    """
+    Group one page's (end_index, term_id) hits into sentences, vectorized
+    
+    Returns (sentence_idx, term_ids, longest): the distinct (sentence, term)
+    pairs of sentences holding 2+ different terms, sorted by sentence then
+    term id, plus the largest number of terms in one sentence.
+    """
+    sentences = np.searchsorted(np.asarray(sentence_bounds, dtype=np.int64), hits[:, 0], side='right')
+    keys = np.unique(sentences * num_terms + hits[:, 1])
+    sentences, term_ids = np.divmod(keys, num_terms)
+    
+    _, sizes = np.unique(sentences, return_counts=True)
+    keep = np.repeat(sizes >= 2, sizes)
+    longest = int(sizes.max()) if len(sizes) else 0
+    
+    return sentences[keep], term_ids[keep], longest
+
+
+def load_graph_compact(graph_file):
+    """Rebuild a NetworkX DiGraph from the arrays written by save_graph_compact"""
+    
+    with np.load(graph_file) as data:
+        indptr = data['indptr']
+        indices = data['indices']
+        weights = data['weights']
+        relationships = data['relationships']
+        node_meta = json.loads(str(data['node_meta']))
+        documents = [str(doc) for doc in data['documents']]
+    
+    # Mentions are (doc_id, page) pairs indexed into graph.graph['documents']
+    graph = nx.DiGraph(documents=documents)
+    for node in node_meta:
+        if node.get('mentions') and isinstance(node['mentions'][0], list):
+            node['mentions'] = [tuple(mention) for mention in node['mentions']]
+    node_ids = [node.pop('id') for node in node_meta]
+    graph.add_nodes_from(zip(node_ids, node_meta))
+    
+    for u, node_id in enumerate(node_ids):
+        for k in range(indptr[u], indptr[u + 1]):
+            graph.add_edge(
+                node_id,
+                node_ids[indices[k]],
+                relationship=str(relationships[k]),
+                weight=int(weights[k])
+            )
+    
+    return graph
+
+
 class GeologicalGraphBuilder:
     """
     Build a knowledge graph from geological text
@@ -18,7 +114,8 @@ class GeologicalGraphBuilder:
     """
     
     def __init__(self):
-        self.graph = nx.MultiDiGraph()  # Support multiple relationships between nodes
+        self.graph = nx.DiGraph()  # Co-mentions only need one weighted edge per pair
+        # Entity catalog categories; see _entity_bits / entity_names()
         self.entities = {
             'platforms': set(),
             'basins': set(),
@@ -66,125 +163,265 @@ class GeologicalGraphBuilder:
             'rezervor': ('feature', 'reservoir'),
             'zăcământ': ('feature', 'deposit'),
         }
+        
+        # One multi-pattern matcher over all terms - a single pass per text
+        # Per term: (term_index, entity_type, en_term, ro_term)
+        self._term_payloads = [
+            (idx, sys.intern(entity_type), sys.intern(en_term), sys.intern(ro_term))
+            for idx, (ro_term, (entity_type, en_term)) in enumerate(self.terminology.items())
+        ]
+        self.automaton = self._build_automaton()
+        self._term_node_ids = [sys.intern(f"{entity_type}:{en_term}") for _, entity_type, en_term, _ in self._term_payloads]
+        
+        # Catalog entries from the terminology are one bit per term id and
+        # category; self.entities only holds names from outside the dictionary
+        self._term_category = [ENTITY_CATEGORIES.get(entity_type) for _, entity_type, _, _ in self._term_payloads]
+        self._entity_bits = {category: bytearray((len(self._term_payloads) + 7) // 8) for category in self.entities}
+        
+        # Co-mention counts per (term id, term id), filled by process_document
+        self._pair_counts = np.zeros((len(self._term_payloads),) * 2, dtype=np.int32)
+        
+        # Mentions are stored as (doc_id, page) tuples; doc_id indexes _docs
+        self._docs = []
+        self._doc_id = {}
+    
+    def _build_automaton(self):
+        """Build an Aho-Corasick automaton over the lowercased Romanian terms"""
+        if ahocorasick is None:
+            return None
+        
+        # Payload is just the term id so hits convert straight to an int array
+        automaton = ahocorasick.Automaton()
+        for term_idx, _, _, ro_term in self._term_payloads:
+            automaton.add_word(ro_term.lower(), term_idx)
+        automaton.make_automaton()
+        return automaton
+    
+    def _find_terms(self, lower_text):
+        """
+        All terminology hits in lowercased text as a (k, 2) array of
+        (end_index, term_id). Falls back to str.find without pyahocorasick
+        """
+        if self.automaton is not None:
+            hits = list(self.automaton.iter(lower_text))
+        else:
+            hits = []
+            for term_idx, _, _, ro_term in self._term_payloads:
+                term = ro_term.lower()
+                pos = lower_text.find(term)
+                while pos != -1:
+                    hits.append((pos + len(term) - 1, term_idx))
+                    pos = lower_text.find(term, pos + 1)
+        
+        return np.array(hits, dtype=np.int64).reshape(-1, 2)
+    
+    def entity_names(self):
+        """Entity catalog as {category: sorted names}"""
+        catalog = {}
+        for category, extra_names in self.entities.items():
+            bits = self._entity_bits[category]
+            names = set(extra_names)
+            for term_idx, payload in enumerate(self._term_payloads):
+                if bits[term_idx >> 3] >> (term_idx & 7) & 1:
+                    names.add(payload[2])
+            catalog[category] = sorted(names)
+        return catalog
+    
+    def get_mentions(self, node_id):
+        """Mentions of a node, with (doc_id, page) translated back to dicts"""
+        mentions = []
+        for mention in self.graph.nodes[node_id].get('mentions', []):
+            if isinstance(mention, tuple):
+                doc_id, page = mention
+                mention = {'document': self._docs[doc_id], 'page': page}
+            mentions.append(mention)
+        return mentions
     
     def load_extracted_data(self, data_dir):
         """Load the previously extracted knowledge"""
         
+        documents = self.iter_extracted_data(data_dir)
+        return dict(documents) if documents is not None else None
+    
+    def iter_extracted_data(self, data_dir):
+        """
+        Stream (doc_name, doc_data) pairs from knowledge_base.json
+        Only one document is held in memory at a time
+        """
+        
         knowledge_file = Path(data_dir) / 'knowledge_base.json'
         
         if not knowledge_file.exists():
             print(f"ERROR: {knowledge_file} not found!")
             return None
         
-        with open(knowledge_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # Parsed copy from a previous run, valid while the JSON is unchanged
+        cache_file = knowledge_file.with_suffix('.pkl')
+        if cache_file.exists() and cache_file.stat().st_mtime >= knowledge_file.stat().st_mtime:
+            return self._read_document_cache(cache_file)
+        
+        return self._parse_documents(knowledge_file, cache_file)
+    
+    def _read_document_cache(self, cache_file):
+        """Yield documents from the cache (one pickle record per document)"""
+        with open(cache_file, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
     
-    def extract_entities_from_document(self, doc_name, document_data):
-        """Extract named entities from document text"""
+    def _parse_documents(self, knowledge_file, cache_file):
+        """Yield documents parsed from the JSON, writing the cache as we go"""
+        
+        tmp_cache = cache_file.with_suffix('.pkl.tmp')
+        try:
+            cache = open(tmp_cache, 'wb')
+        except OSError as e:
+            print(f"  (could not write cache {cache_file.name}: {e})")
+            cache = None
+        
+        with open(knowledge_file, 'rb') as f:
+            if ijson is not None:
+                # Incremental parse of the top-level {doc_name: doc_data} object
+                documents = ijson.kvitems(f, '', use_float=True)
+            elif orjson is not None:
+                documents = orjson.loads(f.read()).items()
+            else:
+                documents = json.loads(f.read().decode('utf-8')).items()
+            
+            for doc_name, doc_data in documents:
+                if cache is not None:
+                    pickle.dump((doc_name, doc_data), cache, protocol=pickle.HIGHEST_PROTOCOL)
+                yield doc_name, doc_data
+        
+        if cache is not None:
+            cache.close()
+            os.replace(tmp_cache, cache_file)
+    
+    def process_document(self, doc_name, document_data):
+        """
+        Extract named entities and co-mentions from document text
+        Each page is lowercased and scanned once; the same hits feed both
+        the node mentions and the corpus-wide pair counts
+        """
         
         print(f"\n  Processing: {doc_name}")
+        
+        # New nodes and this document's mentions are collected first and
+        # flushed into the graph in one batch after the page loop
+        pending_nodes = {}
+        pending_mentions = defaultdict(list)
+        full_text = document_data['document_data']['full_text']
+        doc_id = self._doc_id.setdefault(doc_name, len(self._docs))
+        if doc_id == len(self._docs):
+            self._docs.append(doc_name)
+        
+        # Term ids of every sentence with 2+ entities (one contiguous run per
+        # sentence, arrays per page) - pairs are counted once per document
+        entity_ids = []
+        sentence_ids = []
+        sentence_no = 0
+        longest = 0
        
         # Process each page
-        for page_item in document_data['document_data']['full_text']:
+        for page_item in full_text:
             text = page_item['text']
             page_num = page_item['page']
             
-            # Extract entities using terminology dictionary
-            for ro_term, (entity_type, en_term) in self.terminology.items():
-                # Case-insensitive search
-                pattern = re.compile(re.escape(ro_term), re.IGNORECASE)
-                if pattern.search(text):
-                    # Add to graph
-                    node_id = f"{entity_type}:{en_term}"
-                    
-                    if not self.graph.has_node(node_id):
-                        self.graph.add_node(
-                            node_id,
-                            name=en_term,
-                            romanian_name=ro_term,
-                            type=entity_type,
-                            mentions=[]
-                        )
-                    
-                    # Track mentions
-                    self.graph.nodes[node_id]['mentions'].append({
-                        'document': doc_name,
-                        'page': page_num
-                    })
-                    
-                    # Add to entity catalog
-                    if entity_type == 'platform' or entity_type == 'basin':
-                        self.entities['platforms'].add(en_term)
-                    elif entity_type == 'zone':
-                        self.entities['zones'].add(en_term)
-                    elif entity_type == 'rock':
-                        self.entities['rocks'].add(en_term)
+            # One case-insensitive scan; hits are bucketed by the number of
+            # '.' before them (same split as text.split('.'))
+            lower_text = text.lower()
+            hits = self._find_terms(lower_text)
+            page_term_ids = np.unique(hits[:, 1])
+            
+            # Extract entities using terminology dictionary (terminology order)
+            for term_idx in page_term_ids:
+                _, entity_type, en_term, ro_term = self._term_payloads[term_idx]
+                node_id = self._term_node_ids[term_idx]
+                
+                if node_id not in pending_nodes and not self.graph.has_node(node_id):
+                    pending_nodes[node_id] = {
+                        'name': en_term,
+                        'romanian_name': ro_term,
+                        'type': entity_type,
+                        'mentions': pending_mentions[node_id]
+                    }
+                
+                # Track mentions
+                pending_mentions[node_id].append((doc_id, page_num))
+                
+                # Add to entity catalog
+                category = self._term_category[term_idx]
+                if category is not None:
+                    self._entity_bits[category][term_idx >> 3] |= 1 << (term_idx & 7)
+            
+            # Find entities mentioned together in same sentence (only
+            # possible with 2+ distinct terms on the page)
+            if len(page_term_ids) >= 2:
+                sentence_bounds = [m.start() for m in SENTENCE_END.finditer(lower_text)]
+                sentences, term_ids, max_len = bucket_sentence_hits(
+                    hits, sentence_bounds, len(self._term_payloads)
+                )
+                entity_ids.append(term_ids)
+                sentence_ids.append(sentences + sentence_no)
+                longest = max(longest, max_len)
             
-            # Also extract from previously identified entities
-            if 'entities' in document_data:
-                for zone in document_data['entities'].get('zones', []):
-                    zone_name = zone['name']
-                    node_id = f"zone:{zone_name}"
-                    
-                    if not self.graph.has_node(node_id):
-                        self.graph.add_node(
-                            node_id,
-                            name=zone_name,
-                            type='zone',
-                            mentions=zone.get('pages', [])
-                        )
-                    self.entities['zones'].add(zone_name)
+            sentence_no += lower_text.count('.') + 1
+        
+        # Also extract from previously identified entities (same for every page)
+        if 'entities' in document_data and full_text:
+            for zone in document_data['entities'].get('zones', []):
+                zone_name = zone['name']
+                node_id = f"zone:{zone_name}"
+                
+                if node_id not in pending_nodes and not self.graph.has_node(node_id):
+                    pending_nodes[node_id] = {
+                        'name': zone_name,
+                        'type': 'zone',
+                        'mentions': zone.get('pages', [])
+                    }
+                self.entities['zones'].add(zone_name)
+        
+        self.graph.add_nodes_from(pending_nodes.items())
+        
+        # Nodes created by earlier documents just get their mention lists extended
+        for node_id, mentions in pending_mentions.items():
+            if node_id not in pending_nodes:
+                self.graph.nodes[node_id]['mentions'].extend(mentions)
+        
+        if entity_ids:
+            accumulate_pairs(
+                np.concatenate(entity_ids),
+                np.concatenate(sentence_ids),
+                self._pair_counts,
+                longest
+            )
         
         print(f"    ✓ Added nodes to graph")
     
-    def extract_relationships(self, knowledge_base):
+    def add_relationship_edges(self):
         """
-        Extract relationships between entities based on co-occurrence and context
+        Turn the co-mention counts gathered by process_document into weighted edges
         """
         
         print("\n  Extracting relationships...")
         
-        relationship_patterns = [
-            (r'([\w\s]+)\s+din\s+([\w\s]+)', 'part_of'),  # "X of Y" (X part of Y)
-            (r'([\w\s]+)\s+cuprinde\s+([\w\s]+)', 'contains'),  # "X contains Y"
-            (r'([\w\s]+)\s+se\s+găsește\s+în\s+([\w\s]+)', 'located_in'),  # "X is found in Y"
-        ]
+        # Create co-occurrence relationships (with weight for frequency)
+        new_edges = []
+        for u, v in zip(*np.nonzero(self._pair_counts)):
+            node1_id = self._term_node_ids[u]
+            node2_id = self._term_node_ids[v]
+            weight = int(self._pair_counts[u, v])
+            
+            if self.graph.has_node(node1_id) and self.graph.has_node(node2_id):
+                if self.graph.has_edge(node1_id, node2_id):
+                    self.graph[node1_id][node2_id]['weight'] += weight
+                else:
+                    new_edges.append((node1_id, node2_id, {'relationship': 'co_mentioned', 'weight': weight}))
         
-        for doc_name, doc_data in knowledge_base.items():
-            for page_item in doc_data['document_data']['full_text']:
-                text = page_item['text']
-                
-                # Find entities mentioned together in same sentence
-                sentences = text.split('.')
-                
-                for sentence in sentences:
-                    entities_in_sentence = []
-                    
-                    # Find all entities in this sentence
-                    for ro_term, (entity_type, en_term) in self.terminology.items():
-                        if ro_term.lower() in sentence.lower():
-                            entities_in_sentence.append((entity_type, en_term))
-                    
-                    # Create co-occurrence relationships
-                    if len(entities_in_sentence) >= 2:
-                        for i, (type1, entity1) in enumerate(entities_in_sentence):
-                            for type2, entity2 in entities_in_sentence[i+1:]:
-                                node1_id = f"{type1}:{entity1}"
-                                node2_id = f"{type2}:{entity2}"
-                                
-                                if self.graph.has_node(node1_id) and self.graph.has_node(node2_id):
-                                    # Add relationship (with weight for frequency)
-                                    if self.graph.has_edge(node1_id, node2_id):
-                                        # Increment weight
-                                        for key in self.graph[node1_id][node2_id]:
-                                            self.graph[node1_id][node2_id][key]['weight'] += 1
-                                    else:
-                                        self.graph.add_edge(
-                                            node1_id,
-                                            node2_id,
-                                            relationship='co_mentioned',
-                                            weight=1
-                                        )
+        self.graph.add_edges_from(new_edges)
+        self._pair_counts[:] = 0
         
         print(f"    ✓ Added {self.graph.number_of_edges()} relationships")
     
@@ -195,65 +432,124 @@ class GeologicalGraphBuilder:
         print("BUILDING GEOLOGICAL KNOWLEDGE GRAPH")
         print("="*80)
         
-        # Load extracted data
+        # Load extracted data (streamed one document at a time)
         print("\nLoading extracted knowledge...")
-        knowledge_base = self.load_extracted_data(data_dir)
+        documents = self.iter_extracted_data(data_dir)
         
-        if not knowledge_base:
+        if documents is None:
             return False
         
-        print(f"✓ Loaded {len(knowledge_base)} documents")
-        
-        # Extract entities
+        # Extract entities and co-mentions (single pass over the pages)
         print("\nExtracting entities...")
-        for doc_name, doc_data in knowledge_base.items():
-            self.extract_entities_from_document(doc_name, doc_data)
+        doc_count = 0
+        for doc_name, doc_data in documents:
+            self.process_document(doc_name, doc_data)
+            doc_count += 1
+        
+        if not doc_count:
+            return False
         
+        print(f"\n✓ Loaded {doc_count} documents")
         print(f"\n  Total nodes in graph: {self.graph.number_of_nodes()}")
         
         # Extract relationships
-        self.extract_relationships(knowledge_base)
+        self.add_relationship_edges()
         
         print(f"\n  Total edges in graph: {self.graph.number_of_edges()}")
         
         return True
     
-    def save_graph(self, output_dir):
+    def save_graph(self, output_dir, legacy=False):
         """Save the knowledge graph in multiple formats"""
         
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True)
         
-        # Save as pickle file (for Python access)
-        import pickle
-        graph_file = output_dir / 'geological_graph.pkl'
-        with open(graph_file, 'wb') as f:
-            pickle.dump(self.graph, f)
-        print(f"\n✓ Saved NetworkX graph: {graph_file}")
+        # Always written, so geological_ai never loads a stale graph.npz
+        self.save_graph_compact(output_dir)
+        
+        if legacy:
+            # Also save as pickle file (for older Python scripts)
+            graph_file = output_dir / 'geological_graph.pkl'
+            self.graph.graph['documents'] = self._docs  # doc_id -> name for mentions
+            try:
+                with open(graph_file, 'wb') as f:
+                    pickle.dump(self.graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+            finally:
+                del self.graph.graph['documents']
+            print(f"✓ Saved NetworkX graph: {graph_file}")
         
         # Save as GraphML (for visualization tools)
         graphml_file = output_dir / 'geological_graph.graphml'
-        # Remove mention lists before saving to GraphML (not serializable)
-        graph_copy = self.graph.copy()
-        for node in graph_copy.nodes():
-            if 'mentions' in graph_copy.nodes[node]:
-                graph_copy.nodes[node]['mention_count'] = len(graph_copy.nodes[node]['mentions'])
-                del graph_copy.nodes[node]['mentions']
-        
-        nx.write_graphml(graph_copy, graphml_file)
+        # Swap mention lists for counts while writing GraphML (lists aren't
+        # serializable) - done in place so the graph is never copied
+        saved_mentions = {}
+        for node, node_data in self.graph.nodes(data=True):
+            if 'mentions' in node_data:
+                saved_mentions[node] = node_data.pop('mentions')
+                node_data['mention_count'] = len(saved_mentions[node])
+        
+        try:
+            nx.write_graphml(self.graph, graphml_file)
+        finally:
+            for node, mentions in saved_mentions.items():
+                node_data = self.graph.nodes[node]
+                del node_data['mention_count']
+                node_data['mentions'] = mentions
         print(f"✓ Saved GraphML: {graphml_file}")
         
         # Save entity catalog
         entity_file = output_dir / 'entity_catalog.json'
-        entities_serializable = {k: list(v) for k, v in self.entities.items()}
+        entities_serializable = self.entity_names()
         
-        with open(entity_file, 'w', encoding='utf-8') as f:
-            json.dump(entities_serializable, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open(entity_file, 'wb') as f:
+                f.write(orjson.dumps(entities_serializable, option=orjson.OPT_INDENT_2))
+        else:
+            with open(entity_file, 'w', encoding='utf-8') as f:
+                json.dump(entities_serializable, f, indent=2, ensure_ascii=False)
         print(f"✓ Saved entity catalog: {entity_file}")
         
         # Create summary
         self.create_graph_summary(output_dir)
     
+    def save_graph_compact(self, output_dir):
+        """
+        Save the graph as compressed CSR arrays (graph.npz)
+        Edges become indptr/indices/weights; node attributes go in one JSON string
+        """
+        
+        graph_file = Path(output_dir) / 'graph.npz'
+        
+        node_ids = list(self.graph.nodes())
+        node_index = {node_id: idx for idx, node_id in enumerate(node_ids)}
+        
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        indices = []
+        weights = []
+        relationships = []
+        
+        # Single pass over each node's out-edges, in node order
+        for idx, node_id in enumerate(node_ids):
+            for target, edge_data in self.graph[node_id].items():
+                indices.append(node_index[target])
+                weights.append(edge_data.get('weight', 1))
+                relationships.append(edge_data.get('relationship', ''))
+            indptr[idx + 1] = len(indices)
+        
+        node_meta = [dict(node_data, id=node_id) for node_id, node_data in self.graph.nodes(data=True)]
+        
+        np.savez_compressed(
+            graph_file,
+            indptr=indptr,
+            indices=np.array(indices, dtype=np.int32),
+            weights=np.array(weights, dtype=np.int32),
+            relationships=np.array(relationships, dtype=str),
+            documents=np.array(self._docs, dtype=str),
+            node_meta=np.array(json.dumps(node_meta, ensure_ascii=False))
+        )
+        print(f"\n✓ Saved compact graph: {graph_file}")
+    
     def create_graph_summary(self, output_dir):
         """Create a human-readable summary of the graph"""
         
@@ -267,20 +563,23 @@ class GeologicalGraphBuilder:
             f.write(f'- **Total Relationships:** {self.graph.number_of_edges()}\n\n')
             
             f.write(f'## Entity Types\n\n')
-            for entity_type, entities in self.entities.items():
+            for entity_type, entities in self.entity_names().items():
                 f.write(f'### {entity_type.title()} ({len(entities)})\n\n')
-                for entity in sorted(entities):
+                for entity in entities:
                     f.write(f'- {entity}\n')
                 f.write('\n')
             
             f.write(f'## Most Connected Entities\n\n')
-            # Find nodes with most connections
-            degree_dict = dict(self.graph.degree())
-            top_nodes = sorted(degree_dict.items(), key=lambda x: x[1], reverse=True)[:10]
+            # Find nodes with most connections (partial sort straight off the degree view)
+            top_nodes = heapq.nlargest(10, self.graph.degree(), key=itemgetter(1))
             
             for node_id, degree in top_nodes:
                 node_data = self.graph.nodes[node_id]
-                f.write(f'- **{node_data.get("name", node_id)}** ({degree} connections)\n')
+                # Document names are looked up only here, for the few nodes shown
+                documents = sorted({mention['document'] for mention in self.get_mentions(node_id)
+                                    if isinstance(mention, dict)})
+                where = f" - mentioned in {', '.join(documents)}" if documents else ''
+                f.write(f'- **{node_data.get("name", node_id)}** ({degree} connections){where}\n')
         
         print(f"✓ Saved graph summary: {summary_file}")
 
@@ -291,6 +590,9 @@ def main():
     data_dir = r'c:\cod\licenta\knowledge_extracted'
     output_dir = r'c:\cod\licenta\knowledge_graph'
     
+    # --legacy also writes the NetworkX pickle, next to graph.npz
+    legacy = '--legacy' in sys.argv
+    
     builder = GeologicalGraphBuilder()
     
     # Build the graph
@@ -298,7 +600,7 @@ def main():
     
     if success:
         # Save graph
-        builder.save_graph(output_dir)
+        builder.save_graph(output_dir, legacy=legacy)
         
         print("\n" + "="*80)
         print("✅ KNOWLEDGE GRAPH BUILT SUCCESSFULLY!")
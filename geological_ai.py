@@ -7,16 +7,22 @@ import pickle
 from pathlib import Path
 import networkx as nx
 import json
+from build_knowledge_graph import load_graph_compact
 
 class GeologicalAI:
     """AI assistant that knows Romanian petroleum geology"""
     
     def __init__(self, graph_dir):
         """Load the knowledge graph"""
+        compact_file = Path(graph_dir) / 'graph.npz'
         graph_file = Path(graph_dir) / 'geological_graph.pkl'
         
-        with open(graph_file, 'rb') as f:
-            self.graph = pickle.load(f)
+        if compact_file.exists():
+            self.graph = load_graph_compact(compact_file)
+        else:
+            # Graphs saved before graph.npz existed
+            with open(graph_file, 'rb') as f:
+                self.graph = pickle.load(f)
         
         print(f"✓ Loaded knowledge graph with {self.graph.number_of_nodes()} entities")
         
@@ -56,7 +62,10 @@ class GeologicalAI:
         # Find all neighbors
         for neighbor in self.graph.neighbors(entity_id):
             neighbor_data = self.graph.nodes[neighbor]
-            edge_data = list(self.graph[entity_id][neighbor].values())[0]
+            edge_data = self.graph[entity_id][neighbor]
+            if self.graph.is_multigraph():
+                # Graphs pickled before the DiGraph switch keep keyed edges
+                edge_data = next(iter(edge_data.values()))
             
             connections.append({
                 'entity': neighbor_data.get('name', neighbor),
@@ -4,69 +4,239 @@ Processes the image-based PDF to extract field data
 API: 500 requests/day free, no credit card needed
 """
 
-import requests
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pypdf import PdfReader
+from pypdf import PdfReader, PdfWriter
 import pdf2image
 
+try:
+    import aiohttp  # OCR.space backend (the default) - not needed for local Tesseract
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pytesseract  # local OCR backend (OCR_BACKEND=tesseract)
+except ImportError:
+    pytesseract = None
+
+try:
+    import blake3  # SIMD hashing - much faster than hashlib on page images
+except ImportError:
+    blake3 = None
+
+# Free tier quota - requests are started at most this often, but several
+# can be in flight at once so network latency overlaps
+REQUESTS_PER_MINUTE = 10
+MAX_IN_FLIGHT = 10
+
+# Pages per Poppler run when rendering is pipelined with the uploads
+RENDER_CHUNK = 5
+
+# 'ocrspace' (default) or 'tesseract' - local OCR has no rate limit at all
+OCR_BACKEND = os.environ.get('OCR_BACKEND', 'ocrspace')
+
+# Configure Tesseract path for Windows
+TESSERACT_EXE = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+if pytesseract is not None and os.path.exists(TESSERACT_EXE):
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_EXE
+
+
+class RequestPacer:
+    """Space out request starts so we stay under the per-minute quota"""
+    
+    def __init__(self, per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60 / per_minute
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+    
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _json_bytes(obj, indent=False):
+    """Serialize to UTF-8 JSON (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def otsu_threshold(histogram):
+    """Otsu's threshold for a 256-bin grayscale histogram"""
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best_variance = -1
+    threshold = 0
+    
+    for level, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        
+        sum_bg += level * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            threshold = level
+    
+    return threshold
+
+
+def contiguous_runs(page_numbers, max_length=None):
+    """Group sorted page numbers into [first, last] runs (of at most max_length)"""
+    runs = []
+    for page_num in page_numbers:
+        if (runs and runs[-1][1] == page_num - 1
+                and (max_length is None or page_num - runs[-1][0] < max_length)):
+            runs[-1][1] = page_num
+        else:
+            runs.append([page_num, page_num])
+    return runs
+
+
 class OCRSpaceProcessor:
     """Process PDF using OCR.space free API"""
     
-    def __init__(self, api_key='K87899142388957'):
+    def __init__(self, api_key='K87899142388957', cache_dir='ocr_cache', backend=OCR_BACKEND):
         """
         Initialize with OCR.space API key
         Default key is a public demo key (limited usage)
         Get your own free key at: https://ocr.space/ocrapi
+        
+        cache_dir: OCR results are kept here keyed by a hash of the PDF page,
+                   so a resumed run doesn't render or spend quota on pages
+                   already done
+        backend: 'ocrspace' or 'tesseract' (local, needs pytesseract)
         """
+        if backend == 'tesseract' and pytesseract is None:
+            print("pytesseract not installed - falling back to OCR.space")
+            backend = 'ocrspace'
+        if backend == 'ocrspace' and aiohttp is None:
+            raise ImportError("aiohttp is needed for OCR.space (pip install aiohttp) - "
+                              "or use OCR_BACKEND=tesseract")
+        self.backend = backend
         self.api_key = api_key
         self.api_url = 'https://api.ocr.space/parse/image'
-        self.session = requests.Session()
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        
+    def render_pages(self, pdf_path, first_page, last_page, output_folder):
+        """
+        Rasterize a page range in one Poppler run (parses the PDF once)
+        Pages are written to output_folder and opened lazily from there
+        """
+        # OCR.space reads binarized 150 dpi pages fine; Tesseract wants more
+        dpi = 200 if self.backend == 'tesseract' else 150
+        return pdf2image.convert_from_path(
+            pdf_path,
+            first_page=first_page,
+            last_page=last_page,
+            dpi=dpi,
+            output_folder=output_folder,
+            fmt='jpeg',
+            thread_count=os.cpu_count() or 1
+        )
+    
+    @staticmethod
+    def encode_binarized(image):
+        """
+        Page image as a 1-bit PNG (grayscale + Otsu threshold), no temp file
+        Several times smaller than a color JPEG of the same page
+        """
+        gray = image.convert('L')
+        threshold = otsu_threshold(gray.histogram())
+        binary = gray.point(lambda value: 255 if value > threshold else 0, mode='1')
         
-    def ocr_page_from_pdf(self, pdf_path, page_number):
+        buf = io.BytesIO()
+        binary.save(buf, 'PNG', optimize=True)
+        return buf.getvalue()
+    
+    @staticmethod
+    def content_hash(data):
+        """Hex digest used as the OCR cache key"""
+        if blake3 is not None:
+            return blake3.blake3(data).hexdigest()
+        return hashlib.blake2b(data, digest_size=32).hexdigest()
+    
+    def page_cache_file(self, reader, page_number):
+        """
+        Cache file for one page - keyed by the page's own PDF objects, so it
+        can be checked before paying for rasterization
+        """
+        writer = PdfWriter()
+        writer.add_page(reader.pages[page_number - 1])
+        buf = io.BytesIO()
+        writer.write(buf)
+        key = self.content_hash(buf.getvalue())
+        # Results of the two backends differ - keep them apart
+        if self.backend != 'ocrspace':
+            key = f'{key}.{self.backend}'
+        return self.cache_dir / f'{key}.json'
+    
+    def local_ocr(self, image):
+        """OCR a page image with the local Tesseract install"""
+        try:
+            return pytesseract.image_to_string(image, lang='ron+eng', config='--oem 1 --psm 6')
+        except Exception as e:
+            print(f"    ✗ Tesseract error: {e}")
+            return None
+    
+    async def ocr_page_from_pdf(self, session, image, page_number, pacer=None, cache_file=None):
         """
-        Extract text from a specific page using OCR.space API
+        Extract text from a rendered page image using OCR.space API
+        session: shared aiohttp.ClientSession, pacer: optional RequestPacer
+        cache_file: where to store the text on success
         """
         
         try:
-            # Convert PDF page to image
-            images = pdf2image.convert_from_path(
-                pdf_path,
-                first_page=page_number,
-                last_page=page_number,
-                dpi=200  # Good balance of quality and speed
-            )
+            # Encode in memory - a binarized page is a fraction of the upload size
+            image_bytes = await asyncio.to_thread(self.encode_binarized, image)
             
-            if not images:
-                return None
+            form = aiohttp.FormData()
+            form.add_field('file', image_bytes,
+                           filename=f'page_{page_number}.png', content_type='image/png')
+            form.add_field('apikey', self.api_key)
+            form.add_field('language', 'eng')  # Romanian uses Latin script
+            form.add_field('isOverlayRequired', 'false')
+            # Catalog pages are upright and rendered at a fixed dpi - skip the
+            # server-side orientation pass and upscaling
+            form.add_field('detectOrientation', 'false')
+            form.add_field('scale', 'false')
+            form.add_field('OCREngine', '2')  # Engine 2 is better for complex layouts
             
-            # Save temporarily
-            temp_image = Path('temp_page.png')
-            images[0].save(temp_image, 'PNG')
+            if pacer is not None:
+                await pacer.wait()
             
             # Send to OCR.space API
-            with open(temp_image, 'rb') as f:
-                response = self.session.post(
-                    self.api_url,
-                    files={'file': f},
-                    data={
-                        'apikey': self.api_key,
-                        'language': 'eng',  # Romanian uses Latin script
-                        'isOverlayRequired': False,
-                        'detectOrientation': True,
-                        'scale': True,
-                        'OCREngine': 2,  # Engine 2 is better for complex layouts
-                    },
-                    timeout=60
-                )
+            async with session.post(self.api_url, data=form,
+                                    timeout=aiohttp.ClientTimeout(total=60)) as response:
+                status = response.status
+                # OCR.space doesn't always send a JSON content type
+                result = await response.json(content_type=None) if status == 200 else None
             
-            # Clean up temp file
-            temp_image.unlink(missing_ok=True)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
+            if status == 200:
                 if result.get('IsErroredOnProcessing'):
                     error_msg = result.get('ErrorMessage', ['Unknown error'])
                     print(f"    ✗ OCR Error: {error_msg[0]}")
@@ -75,9 +245,12 @@ class OCRSpaceProcessor:
                 # Extract text
                 if result.get('ParsedResults'):
                     text = result['ParsedResults'][0].get('ParsedText', '')
+                    if cache_file is not None:
+                        cache_file.write_text(json.dumps({'page': page_number, 'text': text},
+                                                         ensure_ascii=False), encoding='utf-8')
                     return text
             else:
-                print(f"    ✗ API Error: {response.status_code}")
+                print(f"    ✗ API Error: {status}")
                 return None
                 
         except Exception as e:
@@ -102,7 +275,10 @@ class OCRSpaceProcessor:
         print(f"{'='*80}")
         print(f"Total pages: {total_pages}")
         print(f"Processing: pages {start_page} to {min(start_page + max_pages - 1, total_pages)}")
-        print(f"Using: OCR.space Free API")
+        if self.backend == 'tesseract':
+            print(f"Using: local Tesseract")
+        else:
+            print(f"Using: OCR.space Free API")
         
         results = {
             'pdf': str(pdf_path),
@@ -113,15 +289,46 @@ class OCRSpaceProcessor:
         
         end_page = min(start_page + max_pages, total_pages + 1)
         
-        for page_num in range(start_page, end_page):
-            print(f"\nPage {page_num}/{total_pages}...", end=' ')
+        page_numbers = range(start_page, end_page)
+        
+        # Every page is written here as soon as its text is known, so an
+        # interrupted batch keeps what it already paid for. Rewritten each run -
+        # pages from earlier runs come back from the page cache
+        pages_file = output_dir / f'ocr_pages_{start_page}_to_{end_page-1}.jsonl'
+        
+        with open(pages_file, 'wb') as pages_out, \
+                tempfile.TemporaryDirectory() as render_dir:
+            # Check the cache before rendering anything
+            cache_files = {page_num: self.page_cache_file(reader, page_num) for page_num in page_numbers}
+            page_texts = {}
+            for page_num, cache_file in cache_files.items():
+                if cache_file.exists():
+                    text = json.loads(cache_file.read_text(encoding='utf-8'))['text']
+                    page_texts[page_num] = text
+                    pages_out.write(_json_bytes({'page': page_num, 'text': text}) + b'\n')
+            missing = [page_num for page_num in page_numbers if page_num not in page_texts]
             
-            # OCR the page
-            text = self.ocr_page_from_pdf(pdf_path, page_num)
+            if page_texts:
+                print(f"Cached: {len(page_texts)} pages (no render or API call needed)")
             
-            if text:
-                print(f"✓ {len(text)} characters")
+            # Only the uncached pages are rendered and OCR'd
+            if self.backend == 'tesseract':
+                # One Poppler run per contiguous run of pages
+                images = []
+                for first_page, last_page in contiguous_runs(missing):
+                    images.extend(self.render_pages(pdf_path, first_page, last_page, render_dir))
                 
+                ocr_texts = self._ocr_pages_local(images, missing, total_pages, cache_files, pages_out)
+            else:
+                # OCR all pages concurrently (paced to the quota), results in page order
+                ocr_texts = asyncio.run(
+                    self._ocr_pages(pdf_path, missing, render_dir, total_pages, cache_files, pages_out)
+                )
+            page_texts.update(zip(missing, ocr_texts))
+        
+        for page_num in page_numbers:
+            text = page_texts.get(page_num)
+            if text:
                 results['pages_processed'].append({
                     'page': page_num,
                     'text': text,
@@ -134,18 +341,11 @@ class OCRSpaceProcessor:
                 if page_num == start_page:
                     print(f"\n  Preview: {text[:200]}...")
             else:
-                print("✗ Failed")
                 results['pages_failed'].append(page_num)
-            
-            # Rate limiting - be nice to free API
-            # Recommended: max 10 requests per minute
-            if page_num < end_page - 1:
-                time.sleep(6)  # 6 seconds = 10 requests/minute
         
         # Save results
         output_file = output_dir / f'ocr_pages_{start_page}_to_{end_page-1}.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        output_file.write_bytes(_json_bytes(results, indent=True))
         
         print(f"\n{'='*80}")
         print(f"BATCH COMPLETE")
@@ -153,9 +353,78 @@ class OCRSpaceProcessor:
         print(f"✓ Processed: {len(results['pages_processed'])} pages")
         print(f"✗ Failed: {len(results['pages_failed'])} pages")
         print(f"📄 Total text: {results['total_characters']:,} characters")
-        print(f"💾 Saved to: {output_file}")
+        print(f"💾 Saved to: {output_file} (per-page log: {pages_file.name})")
         
         return results
+    
+    async def _ocr_pages(self, pdf_path, page_numbers, render_dir, total_pages, cache_files, pages_out):
+        """
+        OCR pages with up to MAX_IN_FLIGHT requests at once
+        Pages are rendered RENDER_CHUNK at a time in a worker thread while
+        earlier pages are uploading, so Poppler stays off the critical path
+        """
+        
+        semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+        # Rate limiting - be nice to free API (max 10 requests per minute)
+        pacer = RequestPacer()
+        connector = aiohttp.TCPConnector(limit=MAX_IN_FLIGHT, limit_per_host=MAX_IN_FLIGHT)
+        
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def ocr_one(image, page_num):
+                async with semaphore:
+                    text = await self.ocr_page_from_pdf(session, image, page_num, pacer,
+                                                        cache_files[page_num])
+                
+                if text:
+                    pages_out.write(_json_bytes({'page': page_num, 'text': text}) + b'\n')
+                    pages_out.flush()
+                    print(f"Page {page_num}/{total_pages}... ✓ {len(text)} characters")
+                else:
+                    print(f"Page {page_num}/{total_pages}... ✗ Failed")
+                return text
+            
+            # Rendered chunks waiting to be turned into upload tasks
+            rendered = asyncio.Queue(maxsize=2)
+            
+            async def render_ahead():
+                # The end marker goes out even if rendering fails, so the loop
+                # below stops and 'await renderer' re-raises the error
+                try:
+                    for first_page, last_page in contiguous_runs(page_numbers, RENDER_CHUNK):
+                        images = await asyncio.to_thread(
+                            self.render_pages, pdf_path, first_page, last_page, render_dir
+                        )
+                        await rendered.put(zip(range(first_page, last_page + 1), images))
+                finally:
+                    await rendered.put(None)
+            
+            renderer = asyncio.create_task(render_ahead())
+            tasks = []
+            while True:
+                chunk = await rendered.get()
+                if chunk is None:
+                    break
+                tasks.extend(asyncio.create_task(ocr_one(image, page_num)) for page_num, image in chunk)
+            await renderer
+            
+            return await asyncio.gather(*tasks)
+    
+    def _ocr_pages_local(self, images, page_numbers, total_pages, cache_files, pages_out):
+        """OCR pages with Tesseract on all cores (it releases the GIL)"""
+        
+        texts = []
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for page_num, text in zip(page_numbers, executor.map(self.local_ocr, images)):
+                if text:
+                    cache_files[page_num].write_text(json.dumps({'page': page_num, 'text': text},
+                                                                ensure_ascii=False), encoding='utf-8')
+                    pages_out.write(_json_bytes({'page': page_num, 'text': text}) + b'\n')
+                    pages_out.flush()
+                    print(f"Page {page_num}/{total_pages}... ✓ {len(text)} characters")
+                else:
+                    print(f"Page {page_num}/{total_pages}... ✗ Failed")
+                texts.append(text)
+        return texts
 
 
 def quick_test():
@@ -3,10 +3,15 @@ OCR Field Catalog - Direct PDF Upload to OCR.space
 No Poppler needed - sends PDF directly to API
 """
 
+import io
 import requests
 import time
 import json
 from pathlib import Path
+from pypdf import PdfReader, PdfWriter
+
+# OCR.space free tier accepts PDFs of up to this many pages per request
+PAGES_PER_REQUEST = 5
 
 class DirectPDFOCR:
     """OCR PDF directly without image conversion"""
@@ -18,7 +23,25 @@ class DirectPDFOCR:
     def ocr_pdf_direct(self, pdf_path, page_start=1, page_end=None):
         """
         OCR PDF pages directly
-        API supports PDFs up to 5 pages at once on free tier
+        API supports PDFs up to 5 pages at once on free tier, so the range
+        is sent as 5-page slices (see ocr_pdf_chunks)
+        """
+        return self.ocr_pdf_chunks(pdf_path, page_start, page_end)
+    
+    def _slice_pdf(self, reader, start, end):
+        """Pages [start, end) (1-based) of an open PDF as a new PDF in memory"""
+        writer = PdfWriter()
+        for page_index in range(start - 1, end - 1):
+            writer.add_page(reader.pages[page_index])
+        
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+    
+    def ocr_pdf_chunks(self, pdf_path, page_start=1, page_end=None):
+        """
+        OCR a page range as 5-page PDF slices - one API call per slice
+        instead of one per page
         """
         
         pdf_file = Path(pdf_path)
@@ -27,26 +50,45 @@ class DirectPDFOCR:
             print(f"Error: {pdf_file} not found")
             return None
         
+        reader = PdfReader(pdf_file)
+        page_end = min(page_end or len(reader.pages), len(reader.pages))
+        
         print(f"\n📄 Processing: {pdf_file.name}")
-        print(f"   Pages: {page_start} to {page_end if page_end else 'end'}")
+        print(f"   Pages: {page_start} to {page_end} ({PAGES_PER_REQUEST} per request)")
+        
+        pages_text = []
+        for chunk_start in range(page_start, page_end + 1, PAGES_PER_REQUEST):
+            chunk_end = min(chunk_start + PAGES_PER_REQUEST, page_end + 1)
+            chunk = self._slice_pdf(reader, chunk_start, chunk_end)
+            
+            chunk_pages = self._post_pdf(chunk, f'pages_{chunk_start}_{chunk_end - 1}.pdf', chunk_start)
+            if chunk_pages:
+                pages_text.extend(chunk_pages)
+            
+            # Rate limiting - max 10 requests per minute on the free tier
+            if chunk_end <= page_end:
+                time.sleep(6)
+        
+        return pages_text
+    
+    def _post_pdf(self, pdf_bytes, filename, page_start):
+        """Send one PDF to OCR.space; ParsedResults are numbered from page_start"""
         
         try:
-            with open(pdf_file, 'rb') as f:
-                # Send PDF directly
-                response = requests.post(
-                    self.api_url,
-                    files={'file': (pdf_file.name, f, 'application/pdf')},
-                    data={
-                        'apikey': self.api_key,
-                        'language': 'eng',
-                        'isOverlayRequired': False,
-                        'detectOrientation': True,
-                        'scale': True,
-                        'OCREngine': 2,  # Engine 2 better for tables
-                        'isTable': True   # Detect tables
-                    },
-                    timeout=120
-                )
+            response = requests.post(
+                self.api_url,
+                files={'file': (filename, pdf_bytes, 'application/pdf')},
+                data={
+                    'apikey': self.api_key,
+                    'language': 'eng',
+                    'isOverlayRequired': False,
+                    'detectOrientation': False,  # pages are upright
+                    'scale': False,  # no server-side upscaling pass
+                    'OCREngine': 2,  # Engine 2 better for tables
+                    'isTable': True   # Detect tables
+                },
+                timeout=120
+            )
             
             if response.status_code == 200:
                 result = response.json()
@@ -91,11 +133,10 @@ def quick_test_direct():
     
     ocr = DirectPDFOCR()
     
-    # OCR.space free tier processes max 1 page per request for PDFs
-    # So we'll do it page by page, but send the whole PDF
-    # The API will just process the first page
+    # OCR.space free tier takes up to PAGES_PER_REQUEST pages per PDF upload -
+    # the first slice is one request
     
-    results = ocr.ocr_pdf_direct(pdf_path, page_start=1)
+    results = ocr.ocr_pdf_direct(pdf_path, page_start=1, page_end=PAGES_PER_REQUEST)
     
     if results:
         print(f"\n✅ SUCCESS! Extracted {len(results)} page(s)")
@@ -4,8 +4,63 @@ Only corrects EXACT matches of known OCR errors
 No fuzzy matching that could change legitimate words
 """
 
+import os
 import re
+import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+try:
+    import ahocorasick  # pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Punctuation peeled off both ends of a token before lookup
+PUNCT = '.,;:!?"\'()[]'
+
+
+@lru_cache(maxsize=50000)
+def split_token(token):
+    """
+    Split a whitespace-delimited token into (prefix, word, suffix)
+    Cached - OCR pages repeat the same tokens over and over
+    """
+    # str.lstrip/rstrip do the stripping in C
+    core = token.lstrip(PUNCT)
+    word = core.rstrip(PUNCT)
+    return token[:len(token) - len(core)], word, core[len(word):]
+
+
+@lru_cache(maxsize=50000)
+def lookup_key(token):
+    """Lowercased word of a token, as used for exact_corrections lookups"""
+    return split_token(token)[1].lower()
+
+
+# Columns of the correction log (stored column-wise, see _log_correction)
+LOG_FIELDS = ('page', 'original', 'corrected', 'confidence', 'context', 'type')
+
+# Correction types - shared string objects for every log row
+TYPE_EXACT = sys.intern('exact_match')
+TYPE_PHRASE = sys.intern('phrase_fix')
+
+# Corrector built once per worker process (see _init_worker)
+_worker_corrector = None
+
+
+def _init_worker():
+    """Build the dictionaries/automaton once in each worker"""
+    global _worker_corrector
+    _worker_corrector = RomanianCorrector()
+
+
+def _correct_page(page):
+    """Correct one (page_num, text) in a worker; returns text, log and stats"""
+    page_num, text = page
+    _worker_corrector.reset()
+    corrected = _worker_corrector.correct_text(text, page_num)
+    return corrected, _worker_corrector._log, dict(_worker_corrector.stats)
 
 
 class RomanianCorrector:
@@ -52,6 +107,16 @@ class RomanianCorrector:
             # Only very specific cases where it's clearly an error
         }
         
+        # Lookups use the lowercased word - normalize the keys once here
+        # rather than lowercasing on every comparison
+        # (values interned - the same few corrections repeat across the log)
+        self.exact_corrections = {wrong.lower(): sys.intern(correct) for wrong, correct in self.exact_corrections.items()}
+        
+        # Words outside this length range can't be a known error - rejected
+        # with an int compare before any lowercasing or hashing
+        self._exact_min_len = min(map(len, self.exact_corrections))
+        self._exact_max_len = max(map(len, self.exact_corrections))
+        
         # Phrase corrections - hyphenated word breaks from line endings
         self.phrase_corrections = {
             'for- mations': 'formations',
@@ -78,10 +143,79 @@ class RomanianCorrector:
             'Creta- ceous': 'Cretaceous',
         }
         
-        # Track corrections
-        self.correction_log = []
+        self.phrase_corrections = {wrong: sys.intern(correct) for wrong, correct in self.phrase_corrections.items()}
+        
+        # All phrases in one alternation, longest first so 'anti- clines'
+        # wins over 'anti- cline' - one scan of the text instead of one per phrase
+        self._phrase_re = re.compile('|'.join(
+            re.escape(wrong) for wrong in sorted(self.phrase_corrections, key=len, reverse=True)
+        ))
+        
+        # One multi-pattern matcher over both the exact errors and the
+        # (lowercased) phrases - a single scan tells which passes a page needs
+        self._phrase_keys = {wrong.lower() for wrong in self.phrase_corrections}
+        self._automaton = self._build_automaton()
+        
+        # Track corrections - one list per LOG_FIELDS column instead of a
+        # dict per correction; correction_log rebuilds the dicts on demand
+        self._log = {field: [] for field in LOG_FIELDS}
         self.stats = defaultdict(int)
     
+    @property
+    def correction_log(self):
+        """Corrections as a list of dicts (built from the log columns)"""
+        return [dict(zip(LOG_FIELDS, row)) for row in zip(*self._log.values())]
+    
+    def num_corrections(self, page=None):
+        """Number of logged corrections, optionally only for one page"""
+        if page is None:
+            return len(self._log['page'])
+        return self._log['page'].count(page)
+    
+    def _log_correction(self, page, original, corrected, confidence, context, correction_type):
+        """Append one correction to the log columns"""
+        log = self._log
+        log['page'].append(page)
+        log['original'].append(original)
+        log['corrected'].append(sys.intern(corrected))
+        log['confidence'].append(confidence)
+        log['context'].append(context)
+        log['type'].append(sys.intern(correction_type))
+    
+    def _build_automaton(self):
+        """Aho-Corasick automaton over exact_corrections and phrase keys"""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for wrong in self._phrase_keys:
+            automaton.add_word(wrong, 'phrase')
+        for wrong in self.exact_corrections:
+            automaton.add_word(wrong, 'exact')
+        automaton.make_automaton()
+        return automaton
+    
+    def _scan_known_errors(self, text):
+        """
+        Which kinds of known OCR error ('exact', 'phrase') occur in text
+        Case-insensitive, so phrase hits are candidates only
+        """
+        lower_text = text.lower()
+        if self._automaton is None:
+            kinds = set()
+            if any(wrong in lower_text for wrong in self._phrase_keys):
+                kinds.add('phrase')
+            if any(wrong in lower_text for wrong in self.exact_corrections):
+                kinds.add('exact')
+            return kinds
+        
+        kinds = set()
+        for _, kind in self._automaton.iter(lower_text):
+            kinds.add(kind)
+            if len(kinds) == 2:
+                break
+        return kinds
+    
     def correct_word(self, word, context="", page=0):
         """
         Correct a single word - ONLY exact matches
@@ -89,19 +223,9 @@ class RomanianCorrector:
         original = word
         
         # Extract punctuation
-        prefix = ""
-        suffix = ""
-        punct = '.,;:!?"\'()[]'
+        prefix, word, suffix = split_token(word)
         
-        while word and word[0] in punct:
-            prefix += word[0]
-            word = word[1:]
-        
-        while word and len(word) > 0 and word[-1] in punct:
-            suffix = word[-1] + suffix
-            word = word[:-1]
-        
-        if not word:
+        if not word or not self._exact_min_len <= len(word) <= self._exact_max_len:
             return original, False, None
         
         # Check for EXACT match only (case-insensitive lookup)
@@ -111,61 +235,100 @@ class RomanianCorrector:
             correction = self.exact_corrections[word_lower]
             corrected = prefix + correction + suffix
             
+            self._log_correction(page, original, corrected, 100.0, context, TYPE_EXACT)
+            self.stats['exact_corrections'] += 1
+            
             log_entry = {
                 'page': page,
                 'original': original,
                 'corrected': corrected,
                 'confidence': 100.0,
                 'context': context,
-                'type': 'exact_match'
+                'type': TYPE_EXACT
             }
-            
-            self.correction_log.append(log_entry)
-            self.stats['exact_corrections'] += 1
-            
             return corrected, True, log_entry
         
         return original, False, None
     
     def apply_phrase_corrections(self, text):
         """Fix hyphenated line-break words"""
-        original = text
+        found = set()
+        
+        def replace(match):
+            wrong = match.group(0)
+            found.add(wrong)
+            return self.phrase_corrections[wrong]
+        
+        text = self._phrase_re.sub(replace, text)
         
+        # One log entry per distinct phrase fixed, in dictionary order
         for wrong, correct in self.phrase_corrections.items():
-            if wrong in text:
-                text = text.replace(wrong, correct)
+            if wrong in found:
                 self.stats['phrase_corrections'] += 1
-                self.correction_log.append({
-                    'page': 0,
-                    'original': wrong,
-                    'corrected': correct,
-                    'confidence': 100.0,
-                    'context': '',
-                    'type': 'phrase_fix'
-                })
+                self._log_correction(0, wrong, correct, 100.0, '', TYPE_PHRASE)
         
         return text
     
     def correct_text(self, text, page=0):
         """Correct text - phrases first, then exact word matches"""
         
+        # One scan decides which of the two passes can find anything
+        kinds = self._scan_known_errors(text)
+        
         # 1. Fix hyphenated breaks
-        text = self.apply_phrase_corrections(text)
+        if 'phrase' in kinds:
+            text = self.apply_phrase_corrections(text)
+            kinds = self._scan_known_errors(text)
         
         # 2. Fix exact word matches only
         words = text.split()
-        corrected_words = []
         
-        for i, word in enumerate(words):
+        # Nothing to fix - only the whitespace normalization applies
+        if 'exact' not in kinds:
+            return ' '.join(words)
+        
+        # Decide once per distinct token, then visit only the positions of
+        # tokens that need fixing (context is built just for those)
+        exact_corrections = self.exact_corrections
+        min_len = self._exact_min_len
+        to_fix = {word for word in set(words)
+                  if len(word) >= min_len and lookup_key(word) in exact_corrections}
+        corrected_words = list(words)
+        
+        for i in [i for i, word in enumerate(words) if word in to_fix]:
             start = max(0, i - 3)
             end = min(len(words), i + 4)
             context = ' '.join(words[start:end])
             
-            corrected, _, _ = self.correct_word(word, context, page)
-            corrected_words.append(corrected)
+            corrected, _, _ = self.correct_word(words[i], context, page)
+            corrected_words[i] = corrected
         
         return ' '.join(corrected_words)
     
+    def correct_pages(self, pages, workers=None):
+        """
+        Correct many (page_num, text) pages in parallel processes
+        Logs and stats are merged back in page order, same as calling
+        correct_text on each page in turn
+        """
+        
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker) as executor:
+            results = list(executor.map(_correct_page, pages, chunksize=4))
+        
+        corrected_pages = []
+        for corrected, log, stats in results:
+            corrected_pages.append(corrected)
+            # Strings from the workers arrive as fresh copies - re-intern
+            for field in ('corrected', 'type'):
+                log[field] = [sys.intern(value) for value in log[field]]
+            for field in LOG_FIELDS:
+                self._log[field].extend(log[field])
+            for key, count in stats.items():
+                self.stats[key] += count
+        
+        return corrected_pages
+    
     def get_correction_report(self):
         """Generate report"""
         lines = []
@@ -176,17 +339,18 @@ class RomanianCorrector:
         lines.append("|------|-------|")
         lines.append(f"| Exact word fixes | {self.stats.get('exact_corrections', 0)} |")
         lines.append(f"| Phrase/hyphen fixes | {self.stats.get('phrase_corrections', 0)} |")
-        lines.append(f"| **Total** | {len(self.correction_log)} |")
+        lines.append(f"| **Total** | {self.num_corrections()} |")
         lines.append("")
         
-        if not self.correction_log:
+        if not self.num_corrections():
             lines.append("## No corrections needed!")
             return '\n'.join(lines)
         
-        # Group by page
+        # Group row indices by page
+        log = self._log
         by_page = defaultdict(list)
-        for entry in self.correction_log:
-            by_page[entry['page']].append(entry)
+        for i, page in enumerate(log['page']):
+            by_page[page].append(i)
         
         lines.append("## All Corrections\n")
         
@@ -199,10 +363,10 @@ class RomanianCorrector:
             lines.append("| OCR Error | Fixed To | Type |")
             lines.append("|-----------|----------|------|")
             
-            for entry in by_page[page]:
-                orig = entry['original'].replace('|', '\\|')
-                corr = entry['corrected'].replace('|', '\\|')
-                lines.append(f"| `{orig}` | `{corr}` | {entry['type']} |")
+            for i in by_page[page]:
+                orig = log['original'][i].replace('|', '\\|')
+                corr = log['corrected'][i].replace('|', '\\|')
+                lines.append(f"| `{orig}` | `{corr}` | {log['type'][i]} |")
             
             lines.append("")
         
@@ -210,7 +374,7 @@ class RomanianCorrector:
     
     def reset(self):
         """Reset tracking"""
-        self.correction_log = []
+        self._log = {field: [] for field in LOG_FIELDS}
         self.stats = defaultdict(int)
 
 
@@ -143,8 +143,7 @@ class SmartOCRWithCorrection:
             all_text_corrected.append(corrected_text)
             
             # Count corrections on this page
-            page_corrections = len([c for c in self.corrector.correction_log 
-                                   if c['page'] == page_num])
+            page_corrections = self.corrector.num_corrections(page_num)
             
             page_results.append({
                 'page': page_num,
@@ -160,7 +159,7 @@ class SmartOCRWithCorrection:
             print(f"{status} {len(ocr_result['words'])} words, "
                   f"{ocr_result['avg_confidence']:.0f}% conf{corr_note}")
         
-        self.stats['corrections_made'] = len(self.corrector.correction_log)
+        self.stats['corrections_made'] = self.corrector.num_corrections()
         
         # Save outputs
         self._save_outputs(output_dir, all_text_raw, all_text_corrected, 
@@ -123,7 +123,8 @@ class SmartOCR:
                     'word': word,
                     'confidence': conf,
                     'page': page_num,
-                    'line': data['line_num'][i]
+                    'line': data['line_num'][i],
+                    '_idx': len(words)  # position in words, for _get_context
                 }
                 
                 words.append(word_info)
@@ -134,7 +135,10 @@ class SmartOCR:
                 if conf < self.confidence_threshold and len(word) > 2:
                     low_confidence.append(word_info)
                     self.stats['low_confidence_words'] += 1
-                    self.stats['pages_needing_review'].add(page_num)
+        
+        # One set entry per page, not one set.add per flagged word
+        if low_confidence:
+            self.stats['pages_needing_review'].add(page_num)
         
         avg_conf = sum(w['confidence'] for w in words) / len(words) if words else 0
         
@@ -148,14 +152,7 @@ class SmartOCR:
     def _get_context(self, words, target_word, window=3):
         """Get surrounding words for context"""
         
-        target_idx = None
-        for i, w in enumerate(words):
-            if w['word'] == target_word['word'] and w.get('line') == target_word.get('line'):
-                target_idx = i
-                break
-        
-        if target_idx is None:
-            return target_word['word']
+        target_idx = target_word['_idx']
         
         start = max(0, target_idx - window)
         end = min(len(words), target_idx + window + 1)
@@ -4,22 +4,410 @@ Processes PDF pages using locally installed Tesseract
 REQUIRES: Tesseract installed on system
 """
 
+import hashlib
+import importlib.util
+import os
+import re
+import shutil
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 import json
-from pypdf import PdfReader
+from pdf2image import convert_from_path
 import time
 
+try:
+    import pypdfium2 as pdfium  # PDFium engine - fast in-process rasterizing
+except ImportError:
+    pdfium = None
+
+try:
+    from tqdm import tqdm  # one progress bar instead of a line per chunk
+except ImportError:
+    tqdm = None
+
+# In-process libtesseract - the engine and Romanian model are loaded once
+# per worker instead of starting tesseract.exe for every chunk. Imported on
+# first use, after _init_worker has limited OpenMP: libgomp reads
+# OMP_THREAD_LIMIT only once, when libtesseract loads
+HAVE_TESSEROCR = importlib.util.find_spec('tesserocr') is not None
+
+# tesserocr API of each thread of this (worker) process, created on first
+# use, and the worker's page thread pool
+_local = threading.local()
+_page_pool = None
+
+# Pages are OCR'd without orientation detection (--psm 3) first; output
+# thinner than this per page is redone with OSD (--psm 1) - unless the
+# document was found upright up front, then OSD can't help
+MIN_CHARS_PER_PAGE = 200
+
+# OSD (--psm 0) must be at least this sure the first page is upright
+OSD_MIN_CONFIDENCE = 2.0
+
+# Romanian tessdata_fast model (integer LSTM) - about twice as fast as the
+# tessdata_best model the UB-Mannheim installer ships, for <1% accuracy on
+# clean print. Put ron.traineddata from
+# https://github.com/tesseract-ocr/tessdata_fast in this folder (the OSD
+# retry also needs osd.traineddata there - copied from the install if missing)
+TESSDATA_FAST_DIR = Path(__file__).parent / 'tessdata_fast'
+
+# Pages are rasterized once, in grayscale, at this resolution - enough for
+# the report's 10-12pt text and 2.25x fewer pixels than Tesseract's 300 DPI
+RENDER_DPI = 200
+
+
+def _chunk_hash(path):
+    """BLAKE2b digest of a chunk PDF - the key of its cached OCR text"""
+    return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
+
+
+def _render_pages(pdf_chunk_path):
+    """Grayscale PIL images of a chunk's pages at RENDER_DPI"""
+    
+    if pdfium is None:
+        yield from convert_from_path(str(pdf_chunk_path), dpi=RENDER_DPI, grayscale=True)
+        return
+    
+    pdf = pdfium.PdfDocument(str(pdf_chunk_path))
+    try:
+        for page_index in range(len(pdf)):
+            page = pdf[page_index]
+            yield page.render(scale=RENDER_DPI / 72, grayscale=True).to_pil()
+            page.close()
+    finally:
+        pdf.close()
+
+
+def _render_tiffs(pdf_chunk_path, render_dir):
+    """Render a chunk to grayscale TIFF files for the CLI - returns their paths"""
+    
+    if pdfium is None:
+        return convert_from_path(str(pdf_chunk_path), dpi=RENDER_DPI, grayscale=True,
+                                 fmt='tiff', output_folder=render_dir, paths_only=True)
+    
+    paths = []
+    for page_num, image in enumerate(_render_pages(pdf_chunk_path), 1):
+        path = Path(render_dir) / f'page-{page_num:04d}.tif'
+        image.save(path, dpi=(RENDER_DPI, RENDER_DPI))  # Tesseract reads the DPI tag
+        paths.append(str(path))
+    return paths
+
+
+def _installed_tessdata(tesseract_cmd):
+    """The install's tessdata folder, as reported by tesseract --list-langs (None if unknown)"""
+    try:
+        result = subprocess.run([tesseract_cmd, '--list-langs'], capture_output=True,
+                                text=True, errors='replace', timeout=10)
+    except Exception:
+        return None
+    
+    # List of available languages in "C:\Program Files\Tesseract-OCR/tessdata/" (3):
+    match = re.search(r'"(.+?)"', result.stdout + result.stderr)
+    return Path(match.group(1)) if match else None
+
+
+def _detect_upright(pdf_chunk_path, tesseract_cmd):
+    """
+    Run Tesseract's OSD once on a chunk's first page
+    Returns True when it is confidently upright - False when rotated or unsure
+    """
+    
+    with tempfile.TemporaryDirectory() as render_dir:
+        try:
+            image = next(iter(_render_pages(pdf_chunk_path)))
+            page = Path(render_dir) / 'page.tif'
+            image.save(page, dpi=(RENDER_DPI, RENDER_DPI))
+            
+            result = subprocess.run(
+                [tesseract_cmd, str(page), '-', '--psm', '0', '-l', 'osd'],
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                timeout=60
+            )
+        except Exception:
+            return False
+    
+    # "Rotate: 0" / "Orientation confidence: 12.34" lines of the OSD report
+    osd = {}
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(':')
+        osd[key.strip()] = value.strip()
+    
+    try:
+        return int(osd['Rotate']) == 0 and float(osd['Orientation confidence']) >= OSD_MIN_CONFIDENCE
+    except (KeyError, ValueError):
+        return False
+
+
+def _thread_api(tesseract_cmd, tessdata_dir=None):
+    """This thread's tesserocr API, created on first use"""
+    import tesserocr
+    
+    api = getattr(_local, 'api', None)
+    if api is None:
+        tessdata = Path(tessdata_dir) if tessdata_dir else Path(tesseract_cmd).parent / 'tessdata'
+        kwargs = {'path': str(tessdata)} if tessdata.is_dir() else {}
+        api = tesserocr.PyTessBaseAPI(lang='ron', **kwargs)
+        api.SetVariable('tessedit_do_invert', '0')
+        _local.api = api
+    return api
+
+
+def _tesserocr_page(image, tesseract_cmd, osd_retry=True, tessdata_dir=None):
+    """OCR one page image with this thread's tesserocr API"""
+    import tesserocr
+    
+    api = _thread_api(tesseract_cmd, tessdata_dir)
+    api.SetPageSegMode(tesserocr.PSM.AUTO)
+    api.SetImage(image)
+    api.SetSourceResolution(RENDER_DPI)  # rendered images carry no DPI info
+    text = api.GetUTF8Text()
+    
+    # Too little text - maybe rotated, try again with OSD
+    # (SetImage again so the page is recognized from scratch)
+    if osd_retry and len(text) < MIN_CHARS_PER_PAGE:
+        api.SetPageSegMode(tesserocr.PSM.AUTO_OSD)
+        api.SetImage(image)
+        api.SetSourceResolution(RENDER_DPI)
+        text = api.GetUTF8Text()
+    return text
+
+
+def _tesserocr_text(pdf_chunk_path, tesseract_cmd, osd_retry=True, page_threads=1, tessdata_dir=None):
+    """
+    OCR every page of a chunk with tesserocr
+    With page_threads > 1 the pages are recognized in parallel threads
+    (tesserocr releases the GIL), each with its own API
+    """
+    global _page_pool
+    
+    images = _render_pages(pdf_chunk_path)
+    
+    if page_threads > 1:
+        # Kept for the life of the worker, so each thread loads the model once
+        if _page_pool is None:
+            _page_pool = ThreadPoolExecutor(max_workers=page_threads)
+        pages = list(_page_pool.map(
+            lambda image: _tesserocr_page(image, tesseract_cmd, osd_retry, tessdata_dir), images))
+    else:
+        pages = [_tesserocr_page(image, tesseract_cmd, osd_retry, tessdata_dir) for image in images]
+    
+    # Same page separator as the tesseract CLI
+    return ''.join(page + '\f' for page in pages)
+
+
+def _tesseract_cli_text(pdf_chunk_path, tesseract_cmd, osd_retry=True, page_threads=1,
+                        tessdata_dir=None):
+    """
+    OCR a chunk with the tesseract executable - returns (text, error)
+    Fast pass without OSD, redone with OSD if the text is suspiciously thin
+    """
+    
+    with tempfile.TemporaryDirectory() as render_dir:
+        # Tesseract reads the rendered pages through a list file, so both
+        # passes reuse them instead of rasterizing the PDF again
+        try:
+            pages = _render_tiffs(pdf_chunk_path, render_dir)
+        except Exception as e:
+            return None, f"Error rendering PDF: {e}"
+        
+        page_list = Path(render_dir) / 'pages.txt'
+        page_list.write_text('\n'.join(pages) + '\n', encoding='utf-8')
+        
+        text, error = _run_tesseract(page_list, tesseract_cmd, psm='3', threads=page_threads,
+                                     tessdata_dir=tessdata_dir)
+        
+        if osd_retry and text is not None and len(text) < MIN_CHARS_PER_PAGE * len(pages):
+            text, error = _run_tesseract(page_list, tesseract_cmd, psm='1', threads=page_threads,
+                                         tessdata_dir=tessdata_dir)
+    
+    return text, error
+
+
+def _run_tesseract(image_input, tesseract_cmd, psm, threads=1, tessdata_dir=None):
+    """One tesseract run over an image or a list file of images - returns (text, error)"""
+    
+    # Default: the models installed with Tesseract
+    tessdata_args = ['--tessdata-dir', str(tessdata_dir)] if tessdata_dir else []
+    
+    try:
+        # Tesseract command: tesseract pages.txt - -l ron
+        # -l ron = Romanian language
+        # '-' = text goes to stdout, no output file to read back
+        result = subprocess.run(
+            [
+                tesseract_cmd,
+                str(image_input),
+                '-',
+                *tessdata_args,
+                '-l', 'ron',  # Romanian language
+                '--psm', psm,  # 3 = automatic segmentation, 1 = same + OSD
+                '-c', 'tessedit_do_invert=0',  # no inverted-text check
+            ],
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            # OpenMP threads per Tesseract - 1 while the pool already runs a
+            # process per core, more only when cores would otherwise idle
+            env={**os.environ, 'OMP_THREAD_LIMIT': str(threads)},
+            timeout=300  # 5 minute timeout per chunk
+        )
+    except subprocess.TimeoutExpired:
+        return None, "Timeout"
+    except Exception as e:
+        return None, f"Error: {e}"
+    
+    if result.returncode == 0:
+        return result.stdout, None
+    
+    return None, f"Failed\n   Error: {result.stderr}"
+
+
+def _ocr_one(pdf_chunk_path, output_dir, tesseract_cmd, cache_file=None, osd_retry=True,
+             page_threads=1, tessdata_dir=None):
+    """
+    OCR one PDF chunk with tesserocr, or the Tesseract CLI without it
+    Module level so pool workers can run it - returns (text, error),
+    text is None when the chunk failed
+    """
+    
+    pdf_name = Path(pdf_chunk_path).stem
+    txt_output = Path(output_dir) / f'{pdf_name}.txt'
+    
+    # Unchanged chunk - reuse the text from an earlier run
+    if cache_file is not None and cache_file.exists():
+        shutil.copyfile(cache_file, txt_output)
+        with open(txt_output, 'r', encoding='utf-8') as f:
+            return f.read(), None
+    
+    if HAVE_TESSEROCR:
+        try:
+            text = _tesserocr_text(pdf_chunk_path, tesseract_cmd, osd_retry, page_threads, tessdata_dir)
+            error = None
+        except Exception as e:
+            text, error = None, f"Error: {e}"
+    else:
+        text, error = _tesseract_cli_text(pdf_chunk_path, tesseract_cmd, osd_retry, page_threads,
+                                          tessdata_dir)
+    
+    if text is not None:
+        with open(txt_output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if cache_file is not None:
+            shutil.copyfile(txt_output, cache_file)
+    
+    return text, error
+
+
+def _ocr_one_summary(pdf_chunk_path, output_dir, tesseract_cmd, cache_file=None, osd_retry=True,
+                     page_threads=1, tessdata_dir=None):
+    """
+    Pool version of _ocr_one - returns (char_count, preview, error)
+    The full text is already in the output file, so it isn't pickled back
+    """
+    text, error = _ocr_one(pdf_chunk_path, output_dir, tesseract_cmd, cache_file, osd_retry,
+                           page_threads, tessdata_dir)
+    if not text:
+        return 0, None, error
+    return len(text), text[:200], None
+
+
+def _init_worker():
+    """
+    Pool worker setup - one OpenMP thread per Tesseract
+    Runs before the worker first imports tesserocr, so libtesseract picks it up too
+    """
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _print_outcome(text, error):
+    """Finish a chunk's progress line"""
+    if text:
+        print(f"✓ {len(text)} characters")
+    else:
+        print(f"✗ {error}")
+
+
 class TesseractBatchOCR:
     """Process PDFs with Tesseract OCR"""
     
-    def __init__(self, tesseract_path='tesseract'):
+    def __init__(self, tesseract_path='tesseract', cache_dir='tesseract_cache', model='fast'):
         """
         Initialize with Tesseract path
         If installed via installer, usually in PATH as 'tesseract'
         Otherwise specify full path: r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+        cache_dir: OCR text of already processed chunks, keyed by the
+                   chunk's content hash (None = no cache)
+        model: 'fast' = ron.traineddata from TESSDATA_FAST_DIR,
+               'best' = the model installed with Tesseract
         """
         self.tesseract_cmd = tesseract_path
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+        self.tessdata_dir = None
+        if model == 'fast':
+            ron_model = TESSDATA_FAST_DIR / 'ron.traineddata'
+            osd_model = TESSDATA_FAST_DIR / 'osd.traineddata'
+            
+            # --psm 1 / AUTO_OSD load osd.traineddata from the same folder
+            if ron_model.exists() and not osd_model.exists():
+                installed = _installed_tessdata(tesseract_path)
+                if installed is not None and (installed / 'osd.traineddata').exists():
+                    shutil.copyfile(installed / 'osd.traineddata', osd_model)
+            
+            if ron_model.exists() and osd_model.exists():
+                self.tessdata_dir = str(TESSDATA_FAST_DIR)
+            else:
+                missing = ron_model if not ron_model.exists() else osd_model
+                print(f"⚠️  No {missing} - using the installed (best) model")
+                model = 'best'
+        self.model = model
+        self._osd_retry = None  # decided by one OSD run on the first chunk
+        
+    def _osd_retry_for(self, pdf_chunk_path):
+        """
+        Whether thin pages should be redone with OSD - decided once
+        The report is uniformly oriented, so if its first page is upright
+        per-page orientation detection can't recover anything
+        """
+        
+        if self._osd_retry is None:
+            upright = _detect_upright(pdf_chunk_path, self.tesseract_cmd)
+            self._osd_retry = not upright
+            print(f"  Orientation: {'upright, OSD retry off' if upright else 'unsure, OSD retry on'}")
+        
+        return self._osd_retry
+    
+    def _cache_files(self, chunk_files):
+        """Cache file for each chunk, and record them in the cache index"""
+        
+        if self.cache_dir is None:
+            return {chunk_file: None for chunk_file in chunk_files}
+        
+        self.cache_dir.mkdir(exist_ok=True)
+        index_file = self.cache_dir / 'index.json'
+        index = {}
+        if index_file.exists():
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        
+        cache_files = {}
+        for chunk_file in chunk_files:
+            key = _chunk_hash(chunk_file)
+            index[key] = Path(chunk_file).name
+            # Text differs between models - cache them separately
+            cache_files[chunk_file] = self.cache_dir / f'{key}-{self.model}.txt'
+        
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        
+        return cache_files
         
     def check_tesseract(self):
         """Check if Tesseract is installed"""
@@ -50,53 +438,23 @@ class TesseractBatchOCR:
     def ocr_pdf_chunk(self, pdf_chunk_path, output_dir='tesseract_results'):
         """
         OCR a PDF chunk using Tesseract
-        Tesseract can process PDF files directly!
+        Pages are rendered to grayscale images and fed to Tesseract
         """
         
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True)
         
-        pdf_name = Path(pdf_chunk_path).stem
-        txt_output = output_dir / f'{pdf_name}.txt'
+        print(f"  Processing: {Path(pdf_chunk_path).name}...", end=' ')
         
-        try:
-            # Tesseract command: tesseract input.pdf output -l ron pdf
-            # -l ron = Romanian language
-            # Will create output.txt
-            
-            print(f"  Processing: {Path(pdf_chunk_path).name}...", end=' ')
-            
-            result = subprocess.run(
-                [
-                    self.tesseract_cmd,
-                    str(pdf_chunk_path),
-                    str(txt_output.with_suffix('')),  # Tesseract adds .txt
-                    '-l', 'ron',  # Romanian language
-                    '--psm', '1',  # Automatic page segmentation with OSD
-                ],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout per chunk
-            )
-            
-            if result.returncode == 0 and txt_output.exists():
-                # Read extracted text
-                with open(txt_output, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                
-                print(f"✓ {len(text)} characters")
-                return text
-            else:
-                print(f"✗ Failed")
-                print(f"   Error: {result.stderr}")
-                return None
-                
-        except subprocess.TimeoutExpired:
-            print(f"✗ Timeout")
-            return None
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            return None
+        cache_file = self._cache_files([pdf_chunk_path])[pdf_chunk_path]
+        osd_retry = True  # unused for cached chunks
+        if cache_file is None or not cache_file.exists():
+            osd_retry = self._osd_retry_for(pdf_chunk_path)
+        # A lone chunk has every core to itself - spread its pages over them
+        text, error = _ocr_one(pdf_chunk_path, output_dir, self.tesseract_cmd, cache_file, osd_retry,
+                               page_threads=os.cpu_count() or 1, tessdata_dir=self.tessdata_dir)
+        _print_outcome(text, error)
+        return text
     
     def process_all_chunks(self, chunks_dir='pdf_chunks', output_dir='tesseract_results'):
         """Process all PDF chunks"""
@@ -116,45 +474,89 @@ class TesseractBatchOCR:
         print(f"Chunks to process: {len(chunk_files)}")
         print(f"Output directory: {output_dir}")
         
+        # Only running totals are kept - per-chunk records go straight to disk
         results = {
-            'chunks_processed': [],
+            'chunks_processed': 0,
             'total_characters': 0,
             'failures': []
         }
         
         start_time = time.time()
         
-        for idx, chunk_file in enumerate(chunk_files, 1):
-            print(f"\n[{idx}/{len(chunk_files)}]", end=' ')
-            
-            text = self.ocr_pdf_chunk(chunk_file, output_dir)
+        Path(output_dir).mkdir(exist_ok=True)
+        cache_files = self._cache_files(chunk_files)
+        
+        # Detect orientation on the first chunk that actually needs OCR
+        to_ocr = [f for f in chunk_files if cache_files[f] is None or not cache_files[f].exists()]
+        osd_retry = self._osd_retry_for(to_ocr[0]) if to_ocr else True
+        
+        # One JSON line per chunk as it finishes, so a crash keeps what's done
+        results_file = Path(output_dir) / 'batch_results.jsonl'
+        
+        # Each chunk is an independent Tesseract run - keep every core busy
+        # With fewer chunks than cores, the spare cores work on pages within a chunk
+        cpus = os.cpu_count() or 1
+        workers = max(1, min(cpus, len(chunk_files)))
+        page_threads = max(1, cpus // workers)
+        with open(results_file, 'w', encoding='utf-8') as results_out, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(_ocr_one_summary, str(chunk_file), str(output_dir), self.tesseract_cmd,
+                                cache_files[chunk_file], osd_retry, page_threads,
+                                self.tessdata_dir): chunk_file
+                for chunk_file in chunk_files
+            }
+            done = as_completed(futures)
+            if tqdm is not None:
+                done = tqdm(done, total=len(futures), desc='OCR', unit='chunk')
             
-            if text:
-                results['chunks_processed'].append({
-                    'chunk': str(chunk_file.name),
-                    'char_count': len(text),
-                    'text_preview': text[:200]
-                })
-                results['total_characters'] += len(text)
-            else:
-                results['failures'].append(str(chunk_file.name))
+            for idx, future in enumerate(done, 1):
+                chunk_file = futures[future]
+                char_count, preview, error = future.result()
+                
+                if char_count:
+                    record = {
+                        'chunk': str(chunk_file.name),
+                        'char_count': char_count,
+                        'text_preview': preview
+                    }
+                    results['chunks_processed'] += 1
+                    results['total_characters'] += char_count
+                else:
+                    record = {'chunk': str(chunk_file.name), 'error': error}
+                    results['failures'].append(str(chunk_file.name))
+                
+                results_out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                results_out.flush()
+                
+                # Only failures interrupt the progress bar
+                if tqdm is not None:
+                    if not char_count:
+                        tqdm.write(f"✗ {chunk_file.name}: {error}")
+                    continue
+                
+                outcome = f"✓ {char_count} characters" if char_count else f"✗ {error}"
+                print(f"\n[{idx}/{len(chunk_files)}]   Processing: {chunk_file.name}... {outcome}")
         
+        results['failures'].sort()
         elapsed_time = time.time() - start_time
         
         print(f"\n{'='*80}")
         print(f"PROCESSING COMPLETE")
         print(f"{'='*80}")
-        print(f"✓ Processed: {len(results['chunks_processed'])} chunks")
+        print(f"✓ Processed: {results['chunks_processed']} chunks")
         print(f"✗ Failed: {len(results['failures'])} chunks")
         print(f"📄 Total text: {results['total_characters']:,} characters")
         print(f"⏱️  Time taken: {elapsed_time/60:.1f} minutes")
         
-        # Save results
-        results_file = Path(output_dir) / 'batch_results.json'
-        with open(results_file, 'w', encoding='utf-8') as f:
+        # Save summary
+        results['elapsed_seconds'] = round(elapsed_time, 1)
+        summary_file = Path(output_dir) / 'summary.json'
+        with open(summary_file, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
         
         print(f"💾 Results saved: {results_file}")
+        print(f"💾 Summary saved: {summary_file}")
         
         return results
 
@@ -3,8 +3,11 @@ Free OCR Comparison Tool for Romanian Geological PDFs
 Tests Tesseract, EasyOCR, and PaddleOCR on the image-based PDF
 """
 
+import hashlib
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pypdf import PdfReader
 import json
@@ -12,9 +15,65 @@ import json
 class OCRComparison:
     """Compare different free OCR solutions"""
     
-    def __init__(self):
+    def __init__(self, warmup=True):
+        """
+        Args:
+            warmup: Load the EasyOCR/PaddleOCR models before the first page
+                    is timed, so model loading doesn't skew the timings
+        """
+        self.warmup = warmup
         self.results = {}
         self.test_pdf = r'c:\cod\licenta\Paraschiv 1979 - Ro oil _ gas fields STE_Seria_A_vol_13.pdf'
+        self._page_cache = {}  # page number -> rendered image
+        # Held while a page's engines run - one OCR run at a time, so the
+        # timings measure the engine and not CPU contention between pages
+        self._timing_lock = threading.Lock()
+        self._text_store = {}  # blake2b key -> OCR text, shared by identical results
+        
+        # (name, test method) of each OCR tool, in the order they're run
+        self._engines = [
+            ('Tesseract', self.test_tesseract),
+            ('EasyOCR', self.test_easyocr),
+            ('PaddleOCR', self.test_paddleocr),
+        ]
+    
+    def _load_easyocr(self):
+        """Create the EasyOCR reader for Romanian"""
+        import easyocr
+        import torch  # EasyOCR runs on PyTorch
+        
+        gpu = torch.cuda.is_available()
+        print(f"    Initializing EasyOCR for Romanian ({'GPU' if gpu else 'CPU'})...")
+        # On CPU the recognizer is int8 dynamically quantized (quantize=True)
+        self.easyocr_reader = easyocr.Reader(['ro'], gpu=gpu, quantize=not gpu)
+    
+    def _load_paddleocr(self):
+        """Create the PaddleOCR engine"""
+        from paddleocr import PaddleOCR
+        import paddle
+        
+        gpu = paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+        print(f"    Initializing PaddleOCR ({'GPU' if gpu else 'CPU'})...")
+        self.paddle_ocr = PaddleOCR(
+            lang='en',  # Use English model for Latin script
+            use_angle_cls=True,
+            use_gpu=gpu,
+            # On CPU run through oneDNN (MKL-DNN) kernels, one thread per core
+            enable_mkldnn=not gpu,
+            cpu_threads=os.cpu_count() or 1,
+            show_log=False
+        )
+    
+    def _init_engines(self):
+        """Load both models once, up front - failures show up per page later"""
+        for name, attr, load in (('EasyOCR', 'easyocr_reader', self._load_easyocr),
+                                 ('PaddleOCR', 'paddle_ocr', self._load_paddleocr)):
+            if hasattr(self, attr):
+                continue
+            try:
+                load()
+            except Exception as e:
+                print(f"    ✗ {name} not available: {e}")
         
     def test_tesseract(self, page_image):
         """Test Tesseract OCR with Romanian language"""
@@ -40,13 +99,11 @@ class OCRComparison:
     def test_easyocr(self, page_image):
         """Test EasyOCR with Romanian"""
         try:
-            import easyocr
             import numpy as np
             
             # Initialize reader for Romanian (once)
             if not hasattr(self, 'easyocr_reader'):
-                print("    Initializing EasyOCR for Romanian...")
-                self.easyocr_reader = easyocr.Reader(['ro'], gpu=False)
+                self._load_easyocr()
             
             # Convert PIL Image to numpy array
             img_array = np.array(page_image)
@@ -74,18 +131,11 @@ class OCRComparison:
     def test_paddleocr(self, page_image):
         """Test PaddleOCR"""
         try:
-            from paddleocr import PaddleOCR
             import numpy as np
             
             # Initialize PaddleOCR (once)
             if not hasattr(self, 'paddle_ocr'):
-                print("    Initializing PaddleOCR...")
-                self.paddle_ocr = PaddleOCR(
-                    lang='en',  # Use English model for Latin script
-                    use_angle_cls=True,
-                    use_gpu=False,
-                    show_log=False
-                )
+                self._load_paddleocr()
             
             # Convert to numpy array
             img_array = np.array(page_image)
@@ -114,7 +164,26 @@ class OCRComparison:
             }
     
     def extract_page_as_image(self, page_num):
-        """Extract a PDF page as an image"""
+        """Extract a PDF page as an image (rendered once, then cached)"""
+        if page_num not in self._page_cache:
+            self._page_cache[page_num] = self._render_page(page_num)
+        return self._page_cache[page_num]
+    
+    def extract_pages_as_images(self, page_nums):
+        """
+        Render several pages at once - the Poppler runs overlap instead of
+        running one after another (the pages are far apart, so a single
+        first..last run would render everything in between)
+        """
+        missing = [p for p in page_nums if p not in self._page_cache]
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                for page_num, image in zip(missing, executor.map(self._render_page, missing)):
+                    self._page_cache[page_num] = image
+        return {p: self._page_cache[p] for p in page_nums}
+    
+    def _render_page(self, page_num):
+        """Render one PDF page with Poppler"""
         try:
             from pdf2image import convert_from_path
             
@@ -142,77 +211,87 @@ class OCRComparison:
         print(f"\nTesting PDF: {Path(self.test_pdf).name}")
         print(f"Test pages: {test_pages}")
         
-        for page_num in test_pages:
-            print(f"\n{'─'*80}")
-            print(f"Testing Page {page_num}")
-            print(f"{'─'*80}")
-            
-            # Extract page as image
-            print("  Extracting page as image (300 DPI)...")
-            page_image = self.extract_page_as_image(page_num)
-            
-            if page_image is None:
-                print(f"  ✗ Failed to extract page {page_num}")
-                continue
-            
-            page_results = {'page': page_num, 'ocr_results': []}
-            
-            # Test each OCR tool
-            print("\n  Testing Tesseract...")
-            start = time.time()
-            tesseract_result = self.test_tesseract(page_image)
-            tesseract_result['time_seconds'] = round(time.time() - start, 2)
-            page_results['ocr_results'].append(tesseract_result)
-            
-            if tesseract_result['success']:
-                print(f"    ✓ Success: {tesseract_result['length']} characters in {tesseract_result['time_seconds']}s")
-            else:
-                print(f"    ✗ Failed: {tesseract_result['error']}")
-            
-            print("\n  Testing EasyOCR...")
-            start = time.time()
-            easyocr_result = self.test_easyocr(page_image)
-            easyocr_result['time_seconds'] = round(time.time() - start, 2)
-            page_results['ocr_results'].append(easyocr_result)
-            
-            if easyocr_result['success']:
-                print(f"    ✓ Success: {easyocr_result['length']} characters, {easyocr_result.get('detections', 0)} detections in {easyocr_result['time_seconds']}s")
-            else:
-                print(f"    ✗ Failed: {easyocr_result['error']}")
-            
-            print("\n  Testing PaddleOCR...")
-            start = time.time()
-            paddle_result = self.test_paddleocr(page_image)
-            paddle_result['time_seconds'] = round(time.time() - start, 2)
-            page_results['ocr_results'].append(paddle_result)
-            
-            if paddle_result['success']:
-                print(f"    ✓ Success: {paddle_result['length']} characters, {paddle_result.get('detections', 0)} detections in {paddle_result['time_seconds']}s")
-            else:
-                print(f"    ✗ Failed: {paddle_result['error']}")
-            
-            self.results[f'page_{page_num}'] = page_results
-            
-            # Show text preview from best result
-            best_result = max(
-                [r for r in page_results['ocr_results'] if r['success']],
-                key=lambda x: x.get('length', 0),
-                default=None
-            )
-            
-            if best_result:
-                print(f"\n  📄 Best result ({best_result['tool']}): Preview first 300 chars:")
-                print(f"  {best_result['text'][:300]}...")
+        # Render all test pages up front, in parallel
+        print("\nExtracting pages as images (300 DPI)...")
+        self.extract_pages_as_images(test_pages)
+        
+        # Model loading happens here, outside the per-page timings
+        if self.warmup:
+            print("\nLoading OCR models...")
+            self._init_engines()
+        
+        # Page threads overlap only the per-page bookkeeping - the OCR runs
+        # themselves take turns (see _run_page); logs are printed in page order
+        if test_pages:
+            with ThreadPoolExecutor(max_workers=len(test_pages)) as executor:
+                for page_num, (page_results, log) in zip(test_pages, executor.map(self._run_page, test_pages)):
+                    print('\n'.join(log))
+                    if page_results is not None:
+                        self.results[f'page_{page_num}'] = page_results
         
         # Save results
         output_file = r'c:\cod\licenta\ocr_comparison_results.json'
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+            json.dump({'texts': self._text_store, 'pages': self.results}, f, indent=2, ensure_ascii=False)
         
         print(f"\n{'='*80}")
         print(f"Results saved to: {output_file}")
         self.print_summary()
     
+    def _run_page(self, page_num):
+        """Run every OCR tool on one page - returns (page_results, log lines)"""
+        
+        log = [f"\n{'─'*80}", f"Testing Page {page_num}", f"{'─'*80}"]
+        
+        # Extract page as image
+        page_image = self.extract_page_as_image(page_num)
+        
+        if page_image is None:
+            log.append(f"  ✗ Failed to extract page {page_num}")
+            return None, log
+        
+        page_results = {'page': page_num, 'ocr_results': []}
+        
+        # Test each OCR tool, one after another - no other page's OCR runs
+        # meanwhile, so the timings aren't skewed by contention
+        with self._timing_lock:
+            for name, test in self._engines:
+                log.append(f"\n  Testing {name}...")
+                start = time.perf_counter()
+                result = test(page_image)
+                result['time_seconds'] = round(time.perf_counter() - start, 2)
+                page_results['ocr_results'].append(result)
+                
+                if result['success']:
+                    detections = f", {result['detections']} detections" if 'detections' in result else ''
+                    log.append(f"    ✓ Success: {result['length']} characters{detections} in {result['time_seconds']}s")
+                else:
+                    log.append(f"    ✗ Failed: {result['error']}")
+        
+        # Show text preview from best result
+        best_result = max(
+            [r for r in page_results['ocr_results'] if r['success']],
+            key=lambda x: x.get('length', 0),
+            default=None
+        )
+        
+        if best_result:
+            log.append(f"\n  📄 Best result ({best_result['tool']}): Preview first 300 chars:")
+            log.append(f"  {best_result['text'][:300]}...")
+        
+        # Results reference their text by key so identical output is stored once
+        for result in page_results['ocr_results']:
+            if 'text' in result:
+                result['text_key'] = self._store_text(result.pop('text'))
+        
+        return page_results, log
+    
+    def _store_text(self, text):
+        """Store text once in the text store - returns its key"""
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+        self._text_store.setdefault(key, text)
+        return key
+    
     def print_summary(self):
         """Print comparison summary"""
         